@@ -1,72 +1,76 @@
-from fastapi import Body, FastAPI, HTTPException
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import Body, FastAPI, HTTPException, Query
 
+from catalog import TitleCatalog, claim_single_worker
 
-BOOKS = [
-    {"title": "Title One", "author": "Author One", "category": "science"},
-    {"title": "Title Two", "author": "Author Two", "category": "science"},
-    {"title": "Title Three", "author": "Author Three", "category": "history"},
-    {"title": "Title Four", "author": "Author Four", "category": "math"},
-    {"title": "Title Five", "author": "Author Five", "category": "math"},
-    {"title": "Title Six", "author": "Author Two", "category": "math"},
-]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    claim_single_worker("books")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+BOOKS = TitleCatalog(
+    [
+        {"title": "Title One", "author": "Author One", "category": "science"},
+        {"title": "Title Two", "author": "Author Two", "category": "science"},
+        {"title": "Title Three", "author": "Author Three", "category": "history"},
+        {"title": "Title Four", "author": "Author Four", "category": "math"},
+        {"title": "Title Five", "author": "Author Five", "category": "math"},
+        {"title": "Title Six", "author": "Author Two", "category": "math"},
+    ]
+)
 
 
 @app.get("/books")
 async def read_all_books():
-    return BOOKS
+    return BOOKS.all()
 
 
 @app.get("/books/{book_title}")
 async def read_book(book_title: str):
-    for book in BOOKS:
-        if book.get("title").casefold() == book_title.casefold():
-            print(book_title.casefold())
-            return book
-    raise HTTPException(status_code=404, detail="Book not found")
+    book = BOOKS.get(book_title)
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book
 
 
 @app.get("/books/")
 async def read_category_by_query(category: str):
-    books_to_return = []
-    for book in BOOKS:
-        if book.get("category").casefold() == category.casefold():
-            books_to_return.append(book)
-    return books_to_return
+    return BOOKS.by_category(category)
 
 
 @app.get("/books/byauthor/{book_author}")
 async def read_author_category_by_query(book_author: str, category: str):
-    books_to_return = []
-    for book in BOOKS:
-        if (
-            book.get("author").casefold() == book_author.casefold()
-            and book.get("category").casefold() == category.casefold()
-        ):
-            books_to_return.append(book)
-    return books_to_return
+    return BOOKS.by_author_category(book_author, category)
+
+
+@app.get("/books/prefix/{title_prefix}")
+async def read_books_by_title_prefix(
+    title_prefix: str, limit: int = Query(default=10, gt=0, le=100)
+):
+    return BOOKS.with_title_prefix(title_prefix, limit)
 
 
 @app.post("/books/create-book")
 async def create_book(new_book: dict = Body(...)):
-    BOOKS.append(new_book)
+    BOOKS.add(new_book)
     return new_book
 
 
 @app.put("/books/update-book")
 async def update_book(updated_book: dict = Body(...)):
-    for i in range(len(BOOKS)):
-        if BOOKS[i].get("title").casefold() == updated_book.get("title").casefold():
-            BOOKS[i] = updated_book
-            return updated_book
-    raise HTTPException(status_code=404, detail="Book not found")
+    if not BOOKS.replace(updated_book):
+        raise HTTPException(status_code=404, detail="Book not found")
+    return updated_book
 
 
 @app.delete("/books/delete-book/{book_title}")
 async def delete_book(book_title: str):
-    for i in range(len(BOOKS)):
-        if BOOKS[i].get("title").casefold() == book_title.casefold():
-            BOOKS.pop(i)
-            return {"message": "Book deleted successfully"}
-    raise HTTPException(status_code=404, detail="Book not found")
+    if BOOKS.remove(book_title) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return {"message": "Book deleted successfully"}
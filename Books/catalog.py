@@ -0,0 +1,277 @@
+import atexit
+import bisect
+import itertools
+import os
+import tempfile
+from typing import Iterable, Protocol
+
+# Lock files held for the life of the process; see claim_single_worker.
+_worker_locks = []
+
+
+class CatalogBook(Protocol):
+    id: int | None
+    rating: int
+    published_date: int
+
+
+class BookCatalog:
+    """
+    In-memory book store with a primary index on id and secondary indexes
+    on rating and published_date. Every lookup, update and delete is O(1)
+    (plus the size of the result); the indexes are updated together on
+    every write so they never disagree with the primary dict.
+    """
+
+    def __init__(self, books: Iterable[CatalogBook] = ()):
+        self._books: dict[int, CatalogBook] = {}
+        # Buckets are dicts keyed by id, not lists, so removal is O(1) too.
+        self._by_rating: dict[int, dict[int, CatalogBook]] = {}
+        self._by_published_date: dict[int, dict[int, CatalogBook]] = {}
+        self._next_id = 1
+        for book in books:
+            self.add(book)
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __iter__(self):
+        return iter(self._books.values())
+
+    def __contains__(self, book_id: int) -> bool:
+        return book_id in self._books
+
+    def all(self) -> list[CatalogBook]:
+        return list(self._books.values())
+
+    def get(self, book_id: int) -> CatalogBook | None:
+        return self._books.get(book_id)
+
+    def by_rating(self, rating: int) -> list[CatalogBook]:
+        return list(self._by_rating.get(rating, {}).values())
+
+    def by_published_date(self, published_date: int) -> list[CatalogBook]:
+        return list(self._by_published_date.get(published_date, {}).values())
+
+    def allocate_id(self) -> int:
+        """Next free id. Ids only grow, so a deleted id is never handed out again."""
+        book_id = self._next_id
+        self._next_id += 1
+        return book_id
+
+    def add(self, book: CatalogBook) -> CatalogBook:
+        """Insert a book, allocating an id when it has none."""
+        if book.id is None:
+            book.id = self.allocate_id()
+        elif book.id in self._books:
+            raise ValueError(f"Book {book.id} already exists")
+        else:
+            self._next_id = max(self._next_id, book.id + 1)
+        self._books[book.id] = book
+        self._index(book)
+        return book
+
+    def replace(self, book: CatalogBook) -> bool:
+        """Swap in a new version of an existing book; False if the id is unknown."""
+        current = self._books.get(book.id)
+        if current is None:
+            return False
+        self._unindex(current)
+        self._books[book.id] = book
+        self._index(book)
+        return True
+
+    def remove(self, book_id: int) -> CatalogBook | None:
+        book = self._books.pop(book_id, None)
+        if book is not None:
+            self._unindex(book)
+        return book
+
+    def _index(self, book: CatalogBook):
+        self._by_rating.setdefault(book.rating, {})[book.id] = book
+        self._by_published_date.setdefault(book.published_date, {})[book.id] = book
+
+    def _unindex(self, book: CatalogBook):
+        for index, key in (
+            (self._by_rating, book.rating),
+            (self._by_published_date, book.published_date),
+        ):
+            bucket = index[key]
+            del bucket[book.id]
+            if not bucket:
+                del index[key]
+
+
+def _fold(value) -> str:
+    return value.casefold() if isinstance(value, str) else ""
+
+
+class TitleCatalog:
+    """
+    Store for the dict books in books.py, matched case-insensitively.
+    Titles, categories and (author, category) pairs are casefolded once,
+    on write, into hash indexes; a sorted list of casefolded titles backs
+    prefix search with a binary search. Duplicate titles are kept, and
+    title lookups see the earliest one, as the list scans did.
+    """
+
+    def __init__(self, books: Iterable[dict] = ()):
+        # Each book gets a private sequence number; buckets are dicts keyed by
+        # it, so they keep insertion order and removal is O(1).
+        self._books: dict[int, dict] = {}
+        self._by_title: dict[str, dict[int, dict]] = {}
+        self._by_category: dict[str, dict[int, dict]] = {}
+        self._by_author_category: dict[tuple[str, str], dict[int, dict]] = {}
+        self._sorted_titles: list[str] = []
+        self._next_seq = 0
+        for book in books:
+            self.add(book)
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def all(self) -> list[dict]:
+        return list(self._books.values())
+
+    def get(self, title: str) -> dict | None:
+        seq = self._first_seq(title)
+        return None if seq is None else self._books[seq]
+
+    def by_category(self, category: str) -> list[dict]:
+        return list(self._by_category.get(_fold(category), {}).values())
+
+    def by_author_category(self, author: str, category: str) -> list[dict]:
+        key = (_fold(author), _fold(category))
+        return list(self._by_author_category.get(key, {}).values())
+
+    def with_title_prefix(self, prefix: str, limit: int) -> list[dict]:
+        """Books whose title starts with prefix, ordered by casefolded title."""
+        prefix = _fold(prefix)
+        matches = []
+        titles = self._sorted_titles
+        # Walk by index from the first candidate; islice would step through
+        # every title before it.
+        for i in range(bisect.bisect_left(titles, prefix), len(titles)):
+            title = titles[i]
+            if len(matches) >= limit or not title.startswith(prefix):
+                break
+            matches.extend(
+                itertools.islice(self._by_title[title].values(), limit - len(matches))
+            )
+        return matches
+
+    def add(self, book: dict) -> dict:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._books[seq] = book
+        self._index(seq, book)
+        return book
+
+    def replace(self, book: dict) -> bool:
+        """Replace the first book with the same title; False if there is none."""
+        seq = self._first_seq(book.get("title"))
+        if seq is None:
+            return False
+        current = self._books[seq]
+        self._books[seq] = book
+        for (index, old_key), (_, new_key) in zip(self._keys(current), self._keys(book)):
+            if old_key == new_key:
+                index[old_key][seq] = book
+            else:
+                self._unindex_key(index, old_key, seq)
+                self._index_key(index, new_key, seq, book)
+        return True
+
+    def remove(self, title: str) -> dict | None:
+        """Remove the first book with this title."""
+        seq = self._first_seq(title)
+        if seq is None:
+            return None
+        book = self._books.pop(seq)
+        self._unindex(seq, book)
+        return book
+
+    def _first_seq(self, title) -> int | None:
+        bucket = self._by_title.get(_fold(title))
+        return next(iter(bucket)) if bucket else None
+
+    def _keys(self, book: dict):
+        title, category = _fold(book.get("title")), _fold(book.get("category"))
+        return (
+            (self._by_title, title),
+            (self._by_category, category),
+            (self._by_author_category, (_fold(book.get("author")), category)),
+        )
+
+    def _index(self, seq: int, book: dict):
+        for index, key in self._keys(book):
+            self._index_key(index, key, seq, book)
+
+    def _unindex(self, seq: int, book: dict):
+        for index, key in self._keys(book):
+            self._unindex_key(index, key, seq)
+
+    def _index_key(self, index: dict, key, seq: int, book: dict):
+        bucket = index.get(key)
+        if bucket is None:
+            index[key] = {seq: book}
+            if index is self._by_title:
+                bisect.insort(self._sorted_titles, key)
+        elif seq > next(reversed(bucket)):
+            bucket[seq] = book
+        else:
+            # A replaced book moving into an existing bucket keeps its list position.
+            bucket[seq] = book
+            index[key] = dict(sorted(bucket.items()))
+
+    def _unindex_key(self, index: dict, key, seq: int):
+        bucket = index[key]
+        del bucket[seq]
+        if not bucket:
+            del index[key]
+            if index is self._by_title:
+                del self._sorted_titles[bisect.bisect_left(self._sorted_titles, key)]
+
+
+def claim_single_worker(name: str):
+    """
+    Refuse to serve the same Books app from a second process. The catalogs
+    live in process memory, so each worker of a multi-worker server would
+    hold, and silently diverge on, its own copy. The first process takes an
+    exclusive lock on a file that it removes again when it exits; later
+    ones fail to start.
+    """
+    try:
+        import fcntl
+    except ImportError:  # no advisory locks on Windows; nothing to enforce with
+        return
+    path = os.path.join(tempfile.gettempdir(), f"fastapi-{name}.lock")
+    while True:
+        handle = open(path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            raise RuntimeError(
+                f"{name} keeps its data in process memory and must run in a single "
+                "worker, but another process is already serving it"
+            ) from None
+        # The previous holder may have removed the file between our open and
+        # our lock; a lock on the removed file would exclude nobody.
+        try:
+            if os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        handle.close()
+    _worker_locks.append(handle)
+    atexit.register(_release_worker_lock, path, handle)
+
+
+def _release_worker_lock(path: str, handle):
+    # Remove while still holding the lock, so no one can lock this file after.
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    handle.close()
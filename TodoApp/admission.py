@@ -0,0 +1,144 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import HTTPException, status
+
+from .passwords import password_hasher
+
+# Longer usernames share a bucket with their prefix; the form puts no
+# limit on the field, and keys are held in memory.
+MAX_KEY_LENGTH = 128
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key: `burst` requests at once, refilled at `rate`
+    per second. Buckets are kept in least-recently-used order; a bucket left
+    idle for burst / rate seconds is full again, which is the same as having
+    no bucket, so it is evicted. `maxsize` bounds memory under key floods.
+    """
+
+    def __init__(self, rate: float, burst: float, maxsize: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.idle_after = burst / rate
+        self.rejected = 0
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take a token; returns 0 if admitted, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+            self.rejected += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def _evict_idle(self, now: float):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < self.idle_after:
+                break
+            del self._buckets[key]
+
+
+class LoginAdmission:
+    """
+    Cheap checks in front of the password check of POST /auth/token.
+    A global cap on logins in flight sheds load with a 503 before any work
+    is done; per-IP and per-username buckets turn bursts from one client or
+    against one account into 429s before the user lookup and bcrypt.
+    """
+
+    def __init__(
+        self,
+        per_ip: TokenBucketLimiter | None,
+        per_username: TokenBucketLimiter | None,
+        max_in_flight: int,
+    ):
+        self.per_ip = per_ip
+        self.per_username = per_username
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.shed = 0
+
+    @classmethod
+    def from_env(cls) -> "LoginAdmission":
+        maxsize = int(os.getenv("LOGIN_LIMITER_SIZE", 100_000))
+        return cls(
+            per_ip=TokenBucketLimiter(
+                rate=float(os.getenv("LOGIN_RATE_PER_IP", 1)),
+                burst=float(os.getenv("LOGIN_BURST_PER_IP", 10)),
+                maxsize=maxsize,
+            ),
+            per_username=TokenBucketLimiter(
+                rate=float(os.getenv("LOGIN_RATE_PER_USERNAME", 0.2)),
+                burst=float(os.getenv("LOGIN_BURST_PER_USERNAME", 5)),
+                maxsize=maxsize,
+            ),
+            # By default no more logins than the password pool accepts, so
+            # excess ones are shed before the user lookup.
+            max_in_flight=int(
+                os.getenv("LOGIN_MAX_IN_FLIGHT", password_hasher.max_pending)
+            ),
+        )
+
+    @contextmanager
+    def admit(self, username: str, client_ip: str | None):
+        if self.in_flight >= self.max_in_flight:
+            self.shed += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress, try again later",
+                headers={"Retry-After": "1"},
+            )
+        wait = 0.0
+        if self.per_ip is not None and client_ip is not None:
+            wait = self.per_ip.acquire(client_ip)
+        if self.per_username is not None:
+            key = username.casefold()[:MAX_KEY_LENGTH]
+            wait = max(wait, self.per_username.acquire(key))
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "shed": self.shed,
+            "ip_buckets": len(self.per_ip) if self.per_ip is not None else 0,
+            "ip_rejected": self.per_ip.rejected if self.per_ip is not None else 0,
+            "username_buckets": (
+                len(self.per_username) if self.per_username is not None else 0
+            ),
+            "username_rejected": (
+                self.per_username.rejected if self.per_username is not None else 0
+            ),
+        }
+
+
+login_admission = LoginAdmission.from_env()
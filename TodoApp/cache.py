@@ -0,0 +1,148 @@
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+
+class CacheBackend(ABC):
+    """
+    Storage used by TodoCache. The interface is async so a shared cache
+    (Redis, memcached) can replace the in-process one without touching
+    the routers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float | None = None): ...
+
+    @abstractmethod
+    async def delete(self, *keys: str): ...
+
+    @abstractmethod
+    async def clear(self): ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+
+class InMemoryCache(CacheBackend):
+    """Bounded LRU with per-entry TTL, local to this process."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+        }
+
+
+class TodoCache:
+    """
+    Cached per-user todo pages and single todos.
+    Every key sits under a per-owner generation token: replacing the token
+    invalidates all of that owner's entries at once, and an entry filled by
+    a request that read the database before a write committed lands under
+    the old token, where it is never read.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def _generation(self, owner_id: int) -> str:
+        generation = await self.backend.get(f"todos:{owner_id}:gen")
+        if generation is None:
+            # A random token, so a lost or evicted generation can never
+            # resurrect pages cached under an earlier one.
+            generation = await self._new_generation(owner_id)
+        return generation
+
+    async def _new_generation(self, owner_id: int) -> str:
+        generation = uuid.uuid4().hex[:12]
+        await self.backend.set(f"todos:{owner_id}:gen", generation)
+        return generation
+
+    async def list_key(self, owner_id: int, query: str) -> str:
+        return f"todos:{owner_id}:{await self._generation(owner_id)}:list:{query}"
+
+    async def item_key(self, owner_id: int, todo_id: int) -> str:
+        return f"todos:{owner_id}:{await self._generation(owner_id)}:item:{todo_id}"
+
+    async def get(self, key: str) -> Any | None:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any):
+        await self.backend.set(key, value)
+
+    async def invalidate(self, owner_id: int):
+        """Drop the owner's list pages and single todos."""
+        await self._new_generation(owner_id)
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        return {**self.backend.stats(), "hits": self.hits, "misses": self.misses}
+
+
+def in_process_cache_size() -> int:
+    """
+    TODO_CACHE_SIZE, or 0 (off) when several worker processes serve the app.
+    An in-process cache never sees writes handled by another worker, which
+    would serve stale pages and ETags until the TTL ran out. Uvicorn and
+    gunicorn take their default worker count from WEB_CONCURRENCY.
+    """
+    if int(os.getenv("WEB_CONCURRENCY", 1)) > 1:
+        return 0
+    return int(os.getenv("TODO_CACHE_SIZE", 10_000))
+
+
+todo_cache = TodoCache(
+    InMemoryCache(
+        maxsize=in_process_cache_size(),
+        ttl=float(os.getenv("TODO_CACHE_TTL", 30)),
+    )
+)
@@ -1,12 +1,184 @@
-from sqlalchemy import create_engine
+import os
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, replace
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from .metrics import instrument_engine
+from .query_budget import query_guard, track_queries
+
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./todosapp.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./todosapp.db"
+# Reads go to a replica when one is configured, otherwise to read-only
+# connections on the same file.
+ASYNC_READ_DATABASE_URL = os.getenv(
+    "DATABASE_REPLICA_URL", "sqlite+aiosqlite:///file:./todosapp.db?mode=ro&uri=true"
+)
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """SQLite pragmas applied to every new connection; None keeps SQLite's default."""
+
+    journal_mode: str | None = None
+    synchronous: str | None = None
+    cache_size: int | None = None  # pages, or KiB when negative
+    mmap_size: int | None = None  # bytes
+    busy_timeout: int | None = None  # milliseconds
+    temp_store: str | None = None
+    query_only: str | None = None
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA {name} = {value}"
+            for name, value in vars(self).items()
+            if value is not None
+        ]
+
+
+ENGINE_PROFILES = {
+    # SQLite out of the box: rollback journal and a full fsync on every commit.
+    "default": EngineProfile(),
+    # WAL lets readers run alongside the writer; NORMAL only fsyncs at
+    # checkpoints, which is still crash-safe in WAL mode.
+    "tuned": EngineProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size=-64_000,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout=5_000,
+        temp_store="MEMORY",
+    ),
+}
+
+
+def get_engine_profile() -> EngineProfile:
+    name = os.getenv("DB_ENGINE_PROFILE", "tuned")
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {name!r}")
+    return ENGINE_PROFILES[name]
+
+
+def apply_engine_profile(engine, profile: EngineProfile):
+    """Run the profile's pragmas on every connection the engine opens."""
+    pragmas = profile.pragmas()
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def read_only_profile(profile: EngineProfile) -> EngineProfile:
+    # journal_mode is a write; the read-write connections already set it.
+    return replace(profile, journal_mode=None, query_only="ON")
+
+
+def pool_options(prefix: str = "DB_") -> dict:
+    return {
+        "pool_size": int(os.getenv(f"{prefix}POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv(f"{prefix}MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv(f"{prefix}POOL_TIMEOUT", 30)),
+    }
+
+
+engine_profile = get_engine_profile()
 
+# Sync engine: schema creation, scripts and tests.
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    **pool_options(),
 )
+apply_engine_profile(engine, engine_profile)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: used by the routers so a query never blocks the event loop.
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **pool_options())
+apply_engine_profile(async_engine.sync_engine, engine_profile)
+instrument_engine(async_engine.sync_engine)
+track_queries(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read-only engine with its own pool, so readers never wait behind writers
+# for a connection.
+read_async_engine = create_async_engine(
+    ASYNC_READ_DATABASE_URL, **pool_options("DB_READ_")
+)
+if read_async_engine.dialect.name == "sqlite":
+    apply_engine_profile(
+        read_async_engine.sync_engine, read_only_profile(engine_profile)
+    )
+instrument_engine(read_async_engine.sync_engine)
+track_queries(read_async_engine.sync_engine)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 Base = declarative_base()
+
+
+# Engines whose pooled connections a forked child must not reuse.
+_fork_disposed_engines = []
+
+
+def dispose_after_fork_in_child(sync_engine):
+    """Have dispose_after_fork drop this engine's pool in forked children."""
+    _fork_disposed_engines.append(sync_engine)
+
+
+def dispose_after_fork():
+    """
+    Forget the pooled connections inherited from the parent process. They
+    are dropped without being closed: the parent (or a sibling worker) may
+    still be using the same file handles, and closing them from here would
+    break it. Each process then opens its own connections on first use.
+    """
+    for sync_engine in _fork_disposed_engines:
+        sync_engine.dispose(close=False)
+
+
+dispose_after_fork_in_child(engine)
+dispose_after_fork_in_child(async_engine.sync_engine)
+dispose_after_fork_in_child(read_async_engine.sync_engine)
+# Covers every way a worker can be forked: TodoApp.serve, gunicorn --preload,
+# multiprocessing's fork start method.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose_after_fork)
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def warm_pool(async_engine):
+    """Open the pool's connections up front, so early requests skip connect and pragmas."""
+    size = async_engine.pool.size() if hasattr(async_engine.pool, "size") else 1
+    async with AsyncExitStack() as stack:
+        for _ in range(size):
+            connection = await stack.enter_async_context(async_engine.connect())
+            await connection.exec_driver_sql("SELECT 1")
+
+
+async def get_db(request: Request):
+    """Read-only session for safe HTTP methods, read-write session otherwise."""
+    if request.method in READ_METHODS:
+        session_factory = AsyncReadSessionLocal
+    else:
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        with query_guard.track(request):
+            yield db
@@ -0,0 +1,62 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import TodoListVersion
+
+
+async def get_todo_list_version(db: AsyncSession, owner_id: int) -> int:
+    result = await db.execute(
+        select(TodoListVersion.version).where(TodoListVersion.owner_id == owner_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+class TodoETag:
+    """
+    Conditional GET support for a user's todos.
+    The ETag is derived from the owner's list version and the request URL,
+    so it changes whenever any of the owner's todos is written and differs
+    between pages and single-todo URLs.
+    """
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.value: str | None = None
+
+    async def not_modified(
+        self, db: AsyncSession, owner_id: int, match_any: bool = True
+    ) -> Response | None:
+        """
+        Return a 304 response when the client's copy is current, else None.
+        `If-None-Match: *` matches any existing representation; routes that
+        haven't yet checked the resource exists pass match_any=False.
+        """
+        version = await get_todo_list_version(db, owner_id)
+        url = self.request.url
+        digest = hashlib.blake2b(
+            f"{owner_id}|{url.path}|{url.query}".encode("utf-8"), digest_size=8
+        ).hexdigest()
+        return self.check(f'W/"{version}-{digest}"', match_any)
+
+    def check(self, value: str, match_any: bool = True) -> Response | None:
+        """Like not_modified, for an ETag that is already known (e.g. cached)."""
+        self.value = value
+        if self._matches(self.request.headers.get("if-none-match"), match_any):
+            return Response(status_code=304, headers={"ETag": self.value})
+        return None
+
+    def apply(self, response: Response):
+        if self.value is not None:
+            response.headers["ETag"] = self.value
+
+    def _matches(self, if_none_match: str | None, match_any: bool) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return match_any
+        # If-None-Match uses weak comparison: ignore the W/ prefix.
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.value.removeprefix("W/") in candidates
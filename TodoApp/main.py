@@ -1,11 +1,58 @@
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
 from fastapi import FastAPI
-from .database import engine, Base
+from fastapi.responses import PlainTextResponse
+from .database import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    async_engine,
+    engine,
+    read_async_engine,
+    warm_pool,
+)
+from .etags import get_todo_list_version
+from .metrics import MetricsMiddleware, metrics
+from .models import create_schema
+from .pagination import DEFAULT_PAGE_SIZE, PageParams
+from .passwords import password_hasher
 from .routers import auth, todos, admin, users
 
-app = FastAPI()
 
+async def warm_statements():
+    """Run the hottest reads once, for an owner that doesn't exist, so their
+    compiled SQL is cached before the first request. The compiled cache is
+    per engine, so each runs on the engine get_db gives its route."""
+    async with AsyncReadSessionLocal() as db:
+        await get_todo_list_version(db, 0)
+        first_page = PageParams(request=None, limit=DEFAULT_PAGE_SIZE, after=None)
+        await db.execute(todos.todo_page(0, first_page))
+        await db.execute(todos.todo_by_id(0, 0))
+    # Login is a POST, so its user lookup runs on the read-write engine.
+    async with AsyncSessionLocal() as db:
+        await db.execute(auth.user_by_username(""))
 
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work lives here rather than at import time, so importing the
+    # app (tests, tooling, every worker process) stays cheap and side-effect
+    # free. Settings read while modules are imported (pools, caches, limits)
+    # must already be in the environment, e.g. via `uvicorn --env-file .env`.
+    load_dotenv()
+    auth.get_signing_key()
+    password_hasher.calibrate()
+    create_schema(engine)
+    await warm_pool(async_engine)
+    await warm_pool(read_async_engine)
+    await warm_statements()
+    yield
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    await read_async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/healthy")
@@ -13,6 +60,13 @@ def health_check():
     return {"status": "Healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 app.include_router(auth.router)
 app.include_router(todos.router)
 app.include_router(admin.router)
@@ -0,0 +1,219 @@
+"""
+Request and database metrics, exposed in the Prometheus text format.
+
+MetricsMiddleware times every request and labels it with the matched route
+template (not the raw path, which would grow the label set without bound).
+Engines passed to instrument_engine report each query's duration into the
+request that issued it through a context variable, so per-request query
+counts and DB time need no extra plumbing in the routers.
+
+Everything runs on the event loop thread, so the counters are plain ints
+and floats with no locking.
+"""
+
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+# Prometheus client defaults, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+@dataclass
+class RequestDBStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_request_db_stats: ContextVar[RequestDBStats | None] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: a count per bucket (plus +Inf), and the sum.
+        # Observing touches one slot; cumulative counts are built on render.
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == "+Inf" else _number(bound))
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        route = ("method", "route")
+        self.request_latency = Histogram(
+            "http_request_duration_seconds", "Request latency by route.", route
+        )
+        self.requests = Counter(
+            "http_requests_total", "Requests by route and status code.", (*route, "status")
+        )
+        self.in_flight = Gauge(
+            "http_requests_in_flight", "Requests currently being served.", ("method",)
+        )
+        self.request_queries = Histogram(
+            "http_request_db_queries",
+            "Database queries issued per request.",
+            route,
+            buckets=QUERY_COUNT_BUCKETS,
+        )
+        self.request_db_time = Histogram(
+            "http_request_db_duration_seconds", "Database time per request.", route
+        )
+        self.queries = Counter("db_queries_total", "Database queries executed.")
+        self.db_time = Counter("db_query_duration_seconds_total", "Time spent in queries.")
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.request_latency,
+            self.requests,
+            self.in_flight,
+            self.request_queries,
+            self.request_db_time,
+            self.queries,
+            self.db_time,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: unlike BaseHTTPMiddleware it adds no extra task
+    per request and leaves streaming responses alone."""
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.metrics = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The route is only known once routing has run, so in-flight requests
+        # are counted per method.
+        in_flight = (scope["method"],)
+        self.metrics.in_flight.inc(in_flight)
+        db_stats = RequestDBStats()
+        token = _request_db_stats.set(db_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db_stats.reset(token)
+            self.metrics.in_flight.dec(in_flight)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE))
+            self.metrics.request_latency.observe(elapsed, labels)
+            self.metrics.requests.inc((*labels, status_code))
+            self.metrics.request_queries.observe(db_stats.queries, labels)
+            self.metrics.request_db_time.observe(db_stats.seconds, labels)
+
+
+def instrument_engine(engine, registry: Metrics = metrics):
+    """Time every query on a (sync, or an async engine's sync_engine) engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        registry.queries.inc()
+        registry.db_time.inc(amount=elapsed)
+        db_stats = _request_db_stats.get()
+        if db_stats is not None:
+            db_stats.queries += 1
+            db_stats.seconds += elapsed
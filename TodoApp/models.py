@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from .database import Base
+from .search import create_search_index
 
 
 class Users(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String, unique=True)
     username = Column(String, unique=True)
     first_name = Column(String)
@@ -18,9 +19,74 @@ class Users(Base):
 class Todos(Base):
     __tablename__ = "todos"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     priority = Column(Integer)
     complete = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
+
+    # Every per-user query filters on owner_id and pages/looks up by id.
+    __table_args__ = (Index("ix_todos_owner_id_id", "owner_id", "id"),)
+
+
+class RefreshToken(Base):
+    """
+    Long-lived refresh tokens. Only an HMAC of the token is stored; rotated
+    tokens keep their row (revoked) so reuse of a stolen one can be detected
+    and its whole family revoked.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String, nullable=False, unique=True)
+    family_id = Column(String, nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(Integer, nullable=False)
+    revoked_at = Column(Integer, nullable=True)
+
+
+class TodoListVersion(Base):
+    """Per-user counter bumped by triggers on every write to that user's todos."""
+
+    __tablename__ = "todo_list_versions"
+
+    owner_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+_BUMP_VERSION = """
+    INSERT INTO todo_list_versions (owner_id, version) VALUES ({owner}, 1)
+    ON CONFLICT (owner_id) DO UPDATE SET version = version + 1;
+"""
+
+# Triggers rather than router code, so batch, admin and any future write
+# path bump the version without an extra round trip.
+TODO_LIST_VERSION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS todos_version_insert
+    AFTER INSERT ON todos WHEN NEW.owner_id IS NOT NULL
+    BEGIN {_BUMP_VERSION.format(owner="NEW.owner_id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_version_update
+    AFTER UPDATE ON todos WHEN NEW.owner_id IS NOT NULL
+    BEGIN {_BUMP_VERSION.format(owner="NEW.owner_id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_version_reassign
+    AFTER UPDATE OF owner_id ON todos
+    WHEN OLD.owner_id IS NOT NULL AND OLD.owner_id IS NOT NEW.owner_id
+    BEGIN {_BUMP_VERSION.format(owner="OLD.owner_id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_version_delete
+    AFTER DELETE ON todos WHEN OLD.owner_id IS NOT NULL
+    BEGIN {_BUMP_VERSION.format(owner="OLD.owner_id")} END""",
+]
+
+
+def create_schema(bind):
+    Base.metadata.create_all(bind=bind)
+    # create_all skips tables that already exist, indexes included.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    with bind.begin() as connection:
+        for trigger in TODO_LIST_VERSION_TRIGGERS:
+            connection.exec_driver_sql(trigger)
+        create_search_index(connection)
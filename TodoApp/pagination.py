@@ -0,0 +1,93 @@
+import base64
+import binascii
+
+from fastapi import HTTPException, Query, Request, Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+# Cursor values are bound as SQLite integers, which are signed 64-bit.
+MAX_CURSOR_VALUE = 2**63 - 1
+
+
+def encode_cursor(value: int, kind: str = "id") -> str:
+    raw = f"{kind}:{value}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str | None, kind: str = "id") -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, _, value = base64.urlsafe_b64decode(padded).decode("ascii").partition(":")
+        position = int(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if prefix != kind or not 0 <= position <= MAX_CURSOR_VALUE:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+
+class PageParams:
+    """
+    Keyset pagination on an integer id column.
+    Clients pass `limit` (capped at MAX_PAGE_SIZE) and the opaque `after`
+    cursor from the previous page; the next page is advertised in a
+    `Link: <...>; rel="next"` response header.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1),
+        after: str | None = Query(default=None),
+    ):
+        self.request = request
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.after_id = decode_cursor(after)
+
+    def apply(self, statement, id_column):
+        if self.after_id:
+            statement = statement.where(id_column > self.after_id)
+        # One extra row tells us whether there is a next page.
+        return statement.order_by(id_column).limit(self.limit + 1)
+
+    def finish(self, rows: list, response: Response) -> list:
+        if len(rows) <= self.limit:
+            return rows
+        rows = rows[: self.limit]
+        next_url = self.request.url.include_query_params(
+            after=encode_cursor(rows[-1].id)
+        )
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return rows
+
+
+class OffsetPageParams:
+    """
+    Pagination for results without a stable id order, such as ranked search.
+    Same `limit`/`after` parameters and Link header as PageParams, but the
+    cursor carries a row offset.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1),
+        after: str | None = Query(default=None),
+    ):
+        self.request = request
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.offset = decode_cursor(after, kind="offset")
+
+    def apply(self, statement):
+        return statement.offset(self.offset).limit(self.limit + 1)
+
+    def finish(self, rows: list, response: Response) -> list:
+        if len(rows) <= self.limit:
+            return rows
+        next_url = self.request.url.include_query_params(
+            after=encode_cursor(self.offset + self.limit, kind="offset")
+        )
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return rows[: self.limit]
@@ -0,0 +1,207 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# bcrypt has a 72-byte limit; truncate to avoid ValueError
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Cost (log2 of the key-expansion rounds) used until calibrate() runs; each
+# step doubles the time of a hash and of a verification. Calibration never
+# goes below BCRYPT_MIN_ROUNDS, however fast the machine.
+BCRYPT_DEFAULT_ROUNDS = 12
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+
+def hash_password(password: str, rounds: int = BCRYPT_DEFAULT_ROUNDS) -> str:
+    pwd_bytes = password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+    return bcrypt.hashpw(pwd_bytes, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    pwd_bytes = password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+    return bcrypt.checkpw(pwd_bytes, hashed_password.encode("utf-8"))
+
+
+def hash_rounds(hashed_password: str) -> int | None:
+    """The cost a hash was made with: "$2b$12$..." -> 12."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def calibrate_rounds(
+    target_seconds: float,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+    sample_rounds: int = 8,
+) -> int:
+    """
+    The highest cost whose verification fits in `target_seconds` on this
+    machine. A cheap hash at `sample_rounds` is timed (best of three, to
+    skip warm-up noise) and scaled up, since every extra round doubles it.
+    """
+    sample = min(
+        _timed(hash_password, "calibration", sample_rounds)[1] for _ in range(3)
+    )
+    if target_seconds <= sample:
+        return min_rounds
+    rounds = sample_rounds + math.floor(math.log2(target_seconds / sample))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+class PasswordHasherBusy(HTTPException):
+    """The pool is saturated; surfaces as a 503 unless the caller can skip the work."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password service is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _timed(func, *args):
+    # Runs inside the worker, so the elapsed time is pure hashing time.
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasherMetrics:
+    def __init__(self):
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    def record(self, queue_wait: float, hash_time: float):
+        self.completed += 1
+        self.queue_wait_seconds += queue_wait
+        self.hash_seconds += hash_time
+        self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, queue_wait)
+
+    def snapshot(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": self.queue_wait_seconds / completed * 1000,
+            "max_queue_wait_ms": self.max_queue_wait_seconds * 1000,
+            "avg_hash_ms": self.hash_seconds / completed * 1000,
+        }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded worker pool so hashing never blocks the event loop.
+    When more than `max_pending` calls are queued or running, new calls are
+    rejected with a 503 instead of piling up behind the pool.
+
+    New hashes use `rounds`. Unless it is pinned, calibrate() (run at
+    startup) replaces it with the cost that makes a verification take about
+    `target_seconds` here; hashes made at a lower cost are upgraded on the
+    next successful login (see needs_rehash).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 16,
+        executor: str = "thread",
+        rounds: int | None = None,
+        target_seconds: float = 0.25,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor
+        self.rounds = BCRYPT_DEFAULT_ROUNDS if rounds is None else rounds
+        self.rounds_pinned = rounds is not None
+        self.target_seconds = target_seconds
+        self.metrics = PasswordHasherMetrics()
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        workers = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+        rounds = os.getenv("PASSWORD_HASH_ROUNDS")
+        return cls(
+            workers=workers,
+            max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", workers * 8)),
+            executor=os.getenv("PASSWORD_HASH_EXECUTOR", "thread"),
+            rounds=int(rounds) if rounds else None,
+            target_seconds=float(os.getenv("PASSWORD_HASH_TARGET_MS", 250)) / 1000,
+        )
+
+    def calibrate(self) -> int:
+        """Pick the cost for new hashes from a timing on this machine."""
+        if not self.rounds_pinned:
+            self.rounds = calibrate_rounds(self.target_seconds)
+        return self.rounds
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Only upgrades: a hash made at a higher cost is left as it is."""
+        rounds = hash_rounds(hashed_password)
+        return rounds is not None and rounds < self.rounds
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise PasswordHasherBusy()
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_time = await loop.run_in_executor(
+                self._get_executor(), _timed, func, *args
+            )
+        finally:
+            self._pending -= 1
+        total = time.perf_counter() - submitted
+        self.metrics.record(max(total - hash_time, 0.0), hash_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def after_fork(self):
+        # The pool's threads or processes belong to the parent; start afresh.
+        self._executor = None
+        self._pending = 0
+
+
+password_hasher = PasswordHasher.from_env()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=password_hasher.after_fork)
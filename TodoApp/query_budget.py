@@ -0,0 +1,126 @@
+"""
+Per-request query counting, route query budgets and N+1 detection.
+
+get_db opens a QueryTracker for each session it hands out; the cursor hook
+installed by track_queries counts every statement into the tracker of the
+current request. Routes opt into a budget with
+`dependencies=[Depends(QueryBudget(n))]`. Going over the budget, or
+repeating the same statement `repeat_limit` times in one request (the
+shape of an N+1 loop), is logged or raised depending on the guard's mode.
+"""
+
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "log", "raise")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryTracker:
+    def __init__(self, guard: "QueryGuard", request: Request | None = None):
+        self.guard = guard
+        self.request = request
+        self.count = 0
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def label(self) -> str:
+        if self.request is None:
+            return "request"
+        return f"{self.request.method} {self.request.url.path}"
+
+    @property
+    def budget(self) -> int | None:
+        if self.request is None:
+            return None
+        return getattr(self.request.state, "query_budget", None)
+
+    def record(self, statement: str):
+        self.count += 1
+        self.statements[statement] += 1
+        budget = self.budget
+        if budget is not None and self.count == budget + 1:
+            self.guard.flag(
+                f"{self.label} exceeded its budget of {budget} queries: {statement!r}"
+            )
+        if self.statements[statement] == self.guard.repeat_limit:
+            self.guard.flag(
+                f"{self.label} ran the same statement {self.guard.repeat_limit} times "
+                f"(possible N+1): {statement!r}"
+            )
+
+
+_current_tracker: ContextVar[QueryTracker | None] = ContextVar(
+    "query_tracker", default=None
+)
+
+
+class QueryGuard:
+    def __init__(self, mode: str = "log", repeat_limit: int = 3):
+        if mode not in MODES:
+            raise ValueError(f"Unknown query budget mode {mode!r}; expected one of {MODES}")
+        self.mode = mode
+        self.repeat_limit = repeat_limit
+
+    @classmethod
+    def from_env(cls) -> "QueryGuard":
+        return cls(
+            mode=os.getenv("QUERY_BUDGET_MODE", "log"),
+            repeat_limit=int(os.getenv("QUERY_REPEAT_LIMIT", 3)),
+        )
+
+    @contextmanager
+    def track(self, request: Request | None = None):
+        """
+        Count the queries issued in this context (the request's task) until
+        the block exits. The tracker is found through a ContextVar, so it
+        covers every session and engine the request uses.
+        """
+        if self.mode == "off":
+            yield None
+            return
+        tracker = QueryTracker(self, request)
+        token = _current_tracker.set(tracker)
+        try:
+            yield tracker
+        finally:
+            _current_tracker.reset(token)
+
+    def flag(self, message: str):
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+query_guard = QueryGuard.from_env()
+
+
+class QueryBudget:
+    """Route dependency declaring the most queries one request may issue."""
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+
+    def __call__(self, request: Request):
+        request.state.query_budget = self.max_queries
+
+
+def track_queries(engine):
+    """Count every statement the engine runs into the current request's tracker."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        tracker = _current_tracker.get()
+        if tracker is not None:
+            tracker.record(statement)
@@ -0,0 +1,41 @@
+import hashlib
+import hmac
+import os
+import secrets
+from datetime import timedelta
+
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=20)
+REFRESH_TOKEN_LIFETIME = timedelta(days=int(os.getenv("REFRESH_TOKEN_DAYS", 14)))
+
+
+def new_refresh_token() -> str:
+    """An opaque, unguessable token; 256 bits from the OS CSPRNG."""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str, key: str) -> str:
+    """
+    What the database stores and looks tokens up by. The token is already
+    random, so a keyed fast digest is enough: unlike a password it can't be
+    brute-forced, and a leaked table is useless without the key.
+    """
+    digest = hmac.new(key.encode("utf-8"), token.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    # Logins prune their own user's expired tokens; this sweeps the rest,
+    # e.g. from a daily cron job.
+    import time
+
+    from sqlalchemy import delete
+
+    from .database import engine
+    from .models import RefreshToken, create_schema
+
+    create_schema(engine)
+    with engine.begin() as connection:
+        result = connection.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at <= int(time.time()))
+        )
+    print(f"Deleted {result.rowcount} expired refresh tokens")
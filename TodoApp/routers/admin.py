@@ -1,7 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, status
-from sqlalchemy.orm import Session
+import json
+from fastapi import APIRouter, Depends, HTTPException, Path, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models
-from ..database import SessionLocal
+from ..admission import login_admission
+from ..cache import todo_cache
+from ..database import get_db
+from ..pagination import PageParams
+from ..query_budget import QueryBudget
+from ..schemas import TodoResponse
+from ..passwords import password_hasher
 from typing import Annotated
 from pydantic import BaseModel, Field
 from ..routers import auth
@@ -10,24 +19,45 @@ from .auth import get_current_user
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def get_db():
-    db = None
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        if db is not None:
-            db.close()
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+user_dependency = Annotated[dict, Depends(get_current_user)]
+page_dependency = Annotated[PageParams, Depends()]
 
+# Rows fetched from the cursor (and written out) per chunk by the export.
+EXPORT_CHUNK_SIZE = 500
 
-db_dependency = Annotated[Session, Depends(get_db)]
-user_dependency = Annotated[dict, Depends(get_current_user)]
+
+@router.get(
+    "/todo",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def read_all(
+    user: user_dependency, db: db_dependency, page: page_dependency, response: Response
+) -> list[TodoResponse]:
+    """
+    Admin endpoint to return all todos by all users, one page at a time.
+    Only users with role 'admin' can access.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+    if user.get("user_role") != "admin":
+        raise HTTPException(status_code=403, detail="Unauthorized: Admins only")
+
+    result = await db.execute(page.apply(select(models.Todos), models.Todos.id))
+    return page.finish(result.scalars().all(), response)
 
 
-@router.get("/todo", status_code=status.HTTP_200_OK)
-async def read_all(user: user_dependency, db: db_dependency):
+@router.get(
+    "/todo/export",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def export_todos(user: user_dependency, db: db_dependency):
     """
-    Admin endpoint to return all todos by all users.
+    Admin endpoint to stream every todo as NDJSON (one JSON object per line).
+    Rows are read from the cursor in chunks, so memory stays flat however
+    large the table is.
     Only users with role 'admin' can access.
     """
     if user is None:
@@ -35,11 +65,29 @@ async def read_all(user: user_dependency, db: db_dependency):
     if user.get("user_role") != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized: Admins only")
 
-    todos = db.query(models.Todos).all()
-    return todos
+    statement = (
+        select(*models.Todos.__table__.columns)
+        .order_by(models.Todos.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
 
+    async def generate():
+        result = await db.stream(statement)
+        async for rows in result.mappings().partitions():
+            yield "".join(json.dumps(dict(row)) + "\n" for row in rows)
 
-@router.delete("/todo/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="todos.ndjson"'},
+    )
+
+
+@router.delete(
+    "/todo/{todo_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def delete_todo(
     user: user_dependency, db: db_dependency, todo_id: int = Path(gt=0)
 ):
@@ -52,10 +100,42 @@ async def delete_todo(
     if user.get("user_role") != "admin":
         raise HTTPException(status_code=403, detail="Unauthorized: Admins only")
 
-    todo_model = db.query(models.Todos).filter(models.Todos.id == todo_id).first()
-    if todo_model is None:
+    result = await db.execute(
+        delete(models.Todos)
+        .where(models.Todos.id == todo_id)
+        .returning(models.Todos.owner_id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.first()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Todo not found")
+    await db.commit()
+    await todo_cache.invalidate(deleted.owner_id)
+
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def read_stats(user: user_dependency):
+    """
+    Admin endpoint exposing runtime counters of in-process services.
+    Only users with role 'admin' can access.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+    if user.get("user_role") != "admin":
+        raise HTTPException(status_code=403, detail="Unauthorized: Admins only")
 
-    db.delete(todo_model)
-    db.commit()
-    return
+    return {
+        "password_hasher": {
+            "pending": password_hasher.pending,
+            "max_pending": password_hasher.max_pending,
+            "rounds": password_hasher.rounds,
+            **password_hasher.metrics.snapshot(),
+        },
+        "token_cache": {
+            "size": len(auth.token_cache),
+            "hits": auth.token_cache.hits,
+            "misses": auth.token_cache.misses,
+        },
+        "todo_cache": todo_cache.stats(),
+        "login_admission": login_admission.stats(),
+    }
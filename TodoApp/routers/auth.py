@@ -1,39 +1,54 @@
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
-import bcrypt
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from jose import jwt
+from jose import jwk, jwt
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import time
+import uuid
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
-from dotenv import load_dotenv
+from functools import cache
 
-load_dotenv(override=True)
-
-from TodoApp.database import SessionLocal
-from ..models import Users
+from TodoApp.database import get_db
+from ..admission import login_admission
+from ..models import RefreshToken, Users
+from ..passwords import PasswordHasherBusy, hash_password, password_hasher
+from ..query_budget import QueryBudget
+from ..refresh_tokens import (
+    ACCESS_TOKEN_LIFETIME,
+    REFRESH_TOKEN_LIFETIME,
+    hash_refresh_token,
+    new_refresh_token,
+)
+from ..token_cache import VerifiedTokenCache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 # import secrets
 # print(secrets.token_hex(64))
 
-SECRET_KEY = os.getenv("JWT_SECRET")
-# print("The JWT_SECRET: ", SECRET_KEY)
-if not SECRET_KEY:
-    raise ValueError("JWT_SECRET environment variable is not set. ")
 ALGORITHM = "HS256"
 
-# bcrypt has a 72-byte limit; truncate to avoid ValueError
-BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Read on first use (or at startup, see main.lifespan) rather than at import.
+def get_secret_key() -> str:
+    secret_key = os.getenv("JWT_SECRET")
+    if not secret_key:
+        raise ValueError("JWT_SECRET environment variable is not set. ")
+    return secret_key
 
 
-def hash_password(password: str) -> str:
-    pwd_bytes = password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
-    return bcrypt.hashpw(pwd_bytes, bcrypt.gensalt()).decode("utf-8")
+@cache
+def get_signing_key() -> jwk.Key:
+    """The JWT key object, built once; jose would rebuild it from the string on every call."""
+    return jwk.construct(get_secret_key(), ALGORITHM)
 
 
+# Claims of already-verified tokens, so repeat requests skip jwt.decode.
+token_cache = VerifiedTokenCache(maxsize=int(os.getenv("JWT_CACHE_SIZE", 10_000)))
+
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
@@ -49,28 +64,36 @@ class CreateUserRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
 
 
-def get_db():
-    db = None
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        if db is not None:
-            db.close()
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 
 
-def authenticate_user(username: str, password: str, db):
-    user = db.query(Users).filter(Users.username == username).first()
+def user_by_username(username: str):
+    return select(Users).where(Users.username == username)
+
+
+async def authenticate_user(username: str, password: str, db: AsyncSession):
+    result = await db.execute(user_by_username(username))
+    user = result.scalars().first()
     if not user:
         return None
-    pwd_bytes = password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
-    if not bcrypt.checkpw(pwd_bytes, user.hashed_password.encode("utf-8")):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
+    # Only a login sees the plain password, so hashes made at a lower cost
+    # are upgraded here; the new hash is written when the caller commits.
+    # The upgrade is optional: with the pool saturated the login goes ahead
+    # and a later one upgrades the hash.
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hasher.hash(password)
+        except PasswordHasherBusy:
+            pass
     return user
 
 
@@ -82,12 +105,15 @@ def create_access_token(
         expires_delta = timedelta(minutes=20)
     expires = datetime.now(timezone.utc) + expires_delta
     encode["exp"] = int(expires.timestamp())  # JWT expects Unix timestamp
-    return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(encode, get_signing_key(), algorithm=ALGORITHM)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_signing_key(), algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         user_id: int = payload.get("id")
         user_role: str = payload.get("role")
@@ -96,7 +122,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
             )
-        return {"username": username, "id": user_id, "user_role": user_role}
+        user = {"username": username, "id": user_id, "user_role": user_role}
+        token_cache.put(token, user, payload.get("exp"))
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
@@ -108,7 +136,11 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
         )
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def create_user(db: db_dependency, create_user_request: CreateUserRequest):
     create_user_model = Users(
         email=create_user_request.email,
@@ -116,28 +148,151 @@ async def create_user(db: db_dependency, create_user_request: CreateUserRequest)
         first_name=create_user_request.first_name,
         last_name=create_user_request.last_name,
         role=create_user_request.role,
-        hashed_password=hash_password(create_user_request.password),
+        hashed_password=await password_hasher.hash(create_user_request.password),
         is_active=True,
     )
     db.add(create_user_model)
-    db.commit()
+    await db.commit()
     # return create_user_model
 
 
-@router.post("/token", response_model=Token)
+@router.post("/token", response_model=Token, dependencies=[Depends(QueryBudget(4))])
 async def login_for_access_token(
-    db: db_dependency, form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request,
+    db: db_dependency,
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    client_ip = request.client.host if request.client else None
+    with login_admission.admit(form_data.username, client_ip):
+        user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    refresh_token = await issue_refresh_token(db, user.id)
+    await db.commit()
     access_token = create_access_token(
         user.username,
         user.id,
         user.role,
-        expires_delta=timedelta(minutes=20),
+        expires_delta=ACCESS_TOKEN_LIFETIME,
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+async def issue_refresh_token(
+    db: AsyncSession, owner_id: int, family_id: str | None = None
+) -> str:
+    """
+    Store a new refresh token (its HMAC only) and return the token itself.
+    The owner's expired tokens are pruned first, so the table stays bounded
+    by the tokens issued within one lifetime. Revoked tokens are kept until
+    they expire, which is as long as their reuse needs detecting.
+    """
+    token = new_refresh_token()
+    await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.owner_id == owner_id)
+        .where(RefreshToken.expires_at <= int(time.time()))
+    )
+    await db.execute(
+        insert(RefreshToken).values(
+            token_hash=hash_refresh_token(token, get_secret_key()),
+            family_id=family_id or uuid.uuid4().hex,
+            owner_id=owner_id,
+            expires_at=int(time.time() + REFRESH_TOKEN_LIFETIME.total_seconds()),
+        )
+    )
+    return token
+
+
+def revoke_refresh_tokens(*criteria):
+    return (
+        update(RefreshToken)
+        .where(*criteria, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=int(time.time()))
+    )
+
+
+@router.post("/refresh", response_model=Token, dependencies=[Depends(QueryBudget(4))])
+async def refresh_access_token(db: db_dependency, refresh_request: RefreshTokenRequest):
+    """
+    Trade a refresh token for a new access token and a new refresh token.
+    Costs one HMAC and one indexed lookup instead of a bcrypt check. The old
+    refresh token is revoked; presenting it again revokes its whole family,
+    since only a copy held by someone else would still be in use.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+    )
+    token_hash = hash_refresh_token(refresh_request.refresh_token, get_secret_key())
+    result = await db.execute(
+        select(
+            RefreshToken.id,
+            RefreshToken.family_id,
+            RefreshToken.owner_id,
+            RefreshToken.expires_at,
+            RefreshToken.revoked_at,
+            Users.username,
+            Users.role,
+            Users.is_active,
+        )
+        .join(Users, Users.id == RefreshToken.owner_id)
+        .where(RefreshToken.token_hash == token_hash)
+    )
+    stored = result.first()
+    if stored is None or stored.expires_at <= time.time() or not stored.is_active:
+        raise invalid
+
+    rotated = None
+    if stored.revoked_at is None:
+        # Conditional, so two concurrent uses of one token can't both rotate it.
+        result = await db.execute(
+            revoke_refresh_tokens(RefreshToken.id == stored.id).returning(
+                RefreshToken.id
+            )
+        )
+        rotated = result.first()
+    if rotated is None:
+        await db.execute(
+            revoke_refresh_tokens(RefreshToken.family_id == stored.family_id)
+        )
+        await db.commit()
+        raise invalid
+
+    refresh_token = await issue_refresh_token(db, stored.owner_id, stored.family_id)
+    await db.commit()
+    access_token = create_access_token(
+        stored.username,
+        stored.owner_id,
+        stored.role,
+        expires_delta=ACCESS_TOKEN_LIFETIME,
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post(
+    "/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def revoke_refresh_token(db: db_dependency, refresh_request: RefreshTokenRequest):
+    """Log out a session: revoke the token and every token rotated from it.
+    Unknown tokens are ignored, so the response says nothing about validity."""
+    token_hash = hash_refresh_token(refresh_request.refresh_token, get_secret_key())
+    family = (
+        select(RefreshToken.family_id)
+        .where(RefreshToken.token_hash == token_hash)
+        .scalar_subquery()
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    await db.execute(revoke_refresh_tokens(RefreshToken.family_id == family))
+    await db.commit()
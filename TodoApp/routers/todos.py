@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response, status
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models
 
 # from ..database import engine, Base
-from ..database import SessionLocal
+from ..cache import todo_cache
+from ..database import get_db
+from ..etags import TodoETag
+from ..pagination import OffsetPageParams, PageParams
+from ..query_budget import QueryBudget
+from ..schemas import TodoResponse
+from ..search import match_expression, todos_fts
 from typing import Annotated
 from pydantic import BaseModel, Field
 from ..routers import auth
@@ -12,18 +19,13 @@ from .auth import get_current_user
 router = APIRouter(prefix="/todos", tags=["todo"])
 
 
-def get_db():
-    db = None
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        if db is not None:
-            db.close()
-
-
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
+page_dependency = Annotated[PageParams, Depends()]
+search_page_dependency = Annotated[OffsetPageParams, Depends()]
+etag_dependency = Annotated[TodoETag, Depends()]
+
+MAX_BATCH_SIZE = 500
 
 
 class TodoRequest(BaseModel):
@@ -33,47 +35,279 @@ class TodoRequest(BaseModel):
     complete: bool = Field(default=False)
 
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def read_all(user: user_dependency, db: db_dependency):
+class TodoBatchUpdate(TodoRequest):
+    id: int = Field(..., gt=0)
+
+
+class TodoBatchDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: int
+    detail: str | None = None
+
+
+# Statements of the hottest reads; main.lifespan also runs them once at
+# startup so they are compiled and cached before the first request.
+def todo_page(owner_id: int, page: PageParams):
+    return page.apply(
+        select(models.Todos).where(models.Todos.owner_id == owner_id), models.Todos.id
+    )
+
+
+def todo_by_id(owner_id: int, todo_id: int):
+    return (
+        select(models.Todos)
+        .where(models.Todos.id == todo_id)
+        .where(models.Todos.owner_id == owner_id)
+    )
+
+
+@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Depends(QueryBudget(2))])
+async def read_all(
+    user: user_dependency,
+    db: db_dependency,
+    page: page_dependency,
+    etag: etag_dependency,
+    response: Response,
+) -> list[TodoResponse]:
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication Failed")
 
-    todos = db.query(models.Todos).filter(models.Todos.owner_id == user.get("id")).all()
+    cache_key = await todo_cache.list_key(user.get("id"), page.request.url.query)
+    cached = await todo_cache.get(cache_key)
+    if cached is not None:
+        cached_etag, link, todos = cached
+        not_modified = etag.check(cached_etag)
+        if not_modified is not None:
+            return not_modified
+        etag.apply(response)
+        if link is not None:
+            response.headers["Link"] = link
+        return todos
+
+    not_modified = await etag.not_modified(db, user.get("id"))
+    if not_modified is not None:
+        return not_modified
+    etag.apply(response)
+
+    result = await db.execute(todo_page(user.get("id"), page))
+    todos = [
+        TodoResponse.model_validate(todo)
+        for todo in page.finish(result.scalars().all(), response)
+    ]
+    await todo_cache.set(cache_key, (etag.value, response.headers.get("Link"), todos))
     return todos
 
 
-@router.get("/{todo_id}", status_code=status.HTTP_200_OK)
-async def read_todo(
-    user: user_dependency, db: db_dependency, todo_id: int = Path(gt=0)
-):
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def search_todos(
+    user: user_dependency,
+    db: db_dependency,
+    page: search_page_dependency,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+) -> list[TodoResponse]:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+
+    expression = match_expression(q)
+    if expression is None:
+        return []
+    result = await db.execute(
+        page.apply(
+            select(models.Todos)
+            .join(todos_fts, todos_fts.c.rowid == models.Todos.id)
+            .where(todos_fts.c.todos_fts.op("MATCH")(expression))
+            .where(models.Todos.owner_id == user.get("id"))
+            .order_by(todos_fts.c.rank, models.Todos.id)
+        )
+    )
+    return page.finish(result.scalars().all(), response)
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def create_todos(
+    user: user_dependency,
+    db: db_dependency,
+    todo_requests: Annotated[
+        list[TodoRequest], Body(min_length=1, max_length=MAX_BATCH_SIZE)
+    ],
+) -> list[BatchItemResult]:
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication Failed")
 
-    todo_model = (
-        db.query(models.Todos)
-        .filter(models.Todos.id == todo_id)
-        .filter(models.Todos.owner_id == user.get("id"))
-        .first()
+    rows = [
+        {**todo_request.model_dump(), "owner_id": user.get("id")}
+        for todo_request in todo_requests
+    ]
+    # A single multi-row INSERT ... RETURNING in one transaction. Asking
+    # SQLAlchemy for parameter-ordered RETURNING would make it fall back to
+    # one INSERT per row on SQLite; SQLite hands out ascending rowids in
+    # VALUES order, so sorting the returned ids restores request order.
+    result = await db.execute(insert(models.Todos).returning(models.Todos.id), rows)
+    created_ids = sorted(result.scalars().all())
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
+    return [BatchItemResult(id=todo_id, status=201) for todo_id in created_ids]
+
+
+@router.put(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def update_todos(
+    user: user_dependency,
+    db: db_dependency,
+    todo_requests: Annotated[
+        list[TodoBatchUpdate], Body(min_length=1, max_length=MAX_BATCH_SIZE)
+    ],
+) -> list[BatchItemResult]:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+
+    requested_ids = {todo_request.id for todo_request in todo_requests}
+    # SQLite starts no transaction for a SELECT, so a delete could land
+    # between the ownership check and the update below and make the bulk
+    # UPDATE fail. Taking the write lock first keeps both in one transaction.
+    await db.execute(text("BEGIN IMMEDIATE"))
+    result = await db.execute(
+        select(models.Todos.id)
+        .where(models.Todos.owner_id == user.get("id"))
+        .where(models.Todos.id.in_(requested_ids))
+    )
+    owned_ids = set(result.scalars().all())
+
+    rows = [
+        todo_request.model_dump()
+        for todo_request in todo_requests
+        if todo_request.id in owned_ids
+    ]
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany statement.
+        await db.execute(update(models.Todos), rows)
+    await db.commit()
+    if rows:
+        await todo_cache.invalidate(user.get("id"))
+    return [
+        BatchItemResult(id=todo_request.id, status=204)
+        if todo_request.id in owned_ids
+        else BatchItemResult(id=todo_request.id, status=404, detail="Todo not found")
+        for todo_request in todo_requests
+    ]
+
+
+@router.delete(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def delete_todos(
+    user: user_dependency, db: db_dependency, todo_batch: TodoBatchDelete
+) -> list[BatchItemResult]:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+
+    # Ownership check and delete in one statement.
+    result = await db.execute(
+        delete(models.Todos)
+        .where(models.Todos.owner_id == user.get("id"))
+        .where(models.Todos.id.in_(todo_batch.ids))
+        .returning(models.Todos.id)
     )
+    deleted_ids = set(result.scalars().all())
+    await db.commit()
+    if deleted_ids:
+        await todo_cache.invalidate(user.get("id"))
+    return [
+        BatchItemResult(id=todo_id, status=204)
+        if todo_id in deleted_ids
+        else BatchItemResult(id=todo_id, status=404, detail="Todo not found")
+        for todo_id in todo_batch.ids
+    ]
+
+
+@router.get(
+    "/{todo_id}",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(2))],
+)
+async def read_todo(
+    user: user_dependency,
+    db: db_dependency,
+    etag: etag_dependency,
+    response: Response,
+    todo_id: int = Path(gt=0),
+) -> TodoResponse:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication Failed")
+
+    cache_key = await todo_cache.item_key(user.get("id"), todo_id)
+    cached = await todo_cache.get(cache_key)
+    if cached is not None:
+        cached_etag, todo = cached
+        not_modified = etag.check(cached_etag)
+        if not_modified is not None:
+            return not_modified
+        etag.apply(response)
+        return todo
+
+    # `If-None-Match: *` must not turn a missing todo into a 304, so it is
+    # only honored once the row has been found.
+    not_modified = await etag.not_modified(db, user.get("id"), match_any=False)
+    if not_modified is not None:
+        return not_modified
+
+    result = await db.execute(todo_by_id(user.get("id"), todo_id))
+    todo_model = result.scalars().first()
     if todo_model is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    return todo_model
+    not_modified = etag.check(etag.value)
+    if not_modified is not None:
+        return not_modified
+    etag.apply(response)
+    todo = TodoResponse.model_validate(todo_model)
+    await todo_cache.set(cache_key, (etag.value, todo))
+    return todo
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def create_todo(
     user: user_dependency, db: db_dependency, todo_request: TodoRequest
-):
+) -> TodoResponse:
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication Failed")
-    todo_model = models.Todos(**todo_request.model_dump(), owner_id=user.get("id"))
-    db.add(todo_model)
-    db.commit()
-    db.refresh(todo_model)
+    result = await db.execute(
+        insert(models.Todos)
+        .values(**todo_request.model_dump(), owner_id=user.get("id"))
+        .returning(models.Todos)
+    )
+    todo_model = result.scalars().one()
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
     return todo_model
 
 
-@router.put("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.put(
+    "/{todo_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def update_todo(
     user: user_dependency,
     db: db_dependency,
@@ -83,38 +317,40 @@ async def update_todo(
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication Failed")
 
-    todo_model = (
-        db.query(models.Todos)
-        .filter(models.Todos.id == todo_id)
-        .filter(models.Todos.owner_id == user.get("id"))
-        .first()
+    # Ownership check and write in one statement; no row back means 404.
+    result = await db.execute(
+        update(models.Todos)
+        .where(models.Todos.id == todo_id)
+        .where(models.Todos.owner_id == user.get("id"))
+        .values(**todo_request.model_dump())
+        .returning(models.Todos.id)
+        .execution_options(synchronize_session=False)
     )
-    if todo_model is None:
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    update_data = todo_request.model_dump()
-    for key, value in update_data.items():
-        setattr(todo_model, key, value)
-    db.commit()
-    db.refresh(todo_model)
-    return todo_model
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
 
 
-@router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{todo_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(1))],
+)
 async def delete_todo(
     user: user_dependency, db: db_dependency, todo_id: int = Path(gt=0)
 ):
     if user is None:
         raise HTTPException(status_code=401, detail="Authentication Failed")
 
-    todo_model = (
-        db.query(models.Todos)
-        .filter(models.Todos.id == todo_id)
-        .filter(models.Todos.owner_id == user.get("id"))
-        .first()
+    result = await db.execute(
+        delete(models.Todos)
+        .where(models.Todos.id == todo_id)
+        .where(models.Todos.owner_id == user.get("id"))
+        .returning(models.Todos.id)
+        .execution_options(synchronize_session=False)
     )
-    if todo_model is None:
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    db.delete(todo_model)
-    db.commit()
-    return
+    await db.commit()
+    await todo_cache.invalidate(user.get("id"))
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class TodoResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str | None = None
+    priority: int | None = None
+    complete: bool | None = None
+    owner_id: int | None = None
+
+
+class UserResponse(BaseModel):
+    """Public view of a user; never includes the password hash."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str | None = None
+    email: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    role: str | None = None
+    is_active: bool | None = None
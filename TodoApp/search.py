@@ -0,0 +1,78 @@
+"""Full-text search over todo titles and descriptions (SQLite FTS5).
+
+``todos_fts`` is an external-content FTS5 table: it stores only the index,
+reads the text back from ``todos`` by rowid, and is kept in sync by
+triggers, so every write path (single, batch, admin) is covered.
+
+Rebuild the index of an existing database with:
+
+    python -m TodoApp.search
+"""
+
+import re
+
+from sqlalchemy import column, inspect, table
+
+TODO_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description, content='todos', content_rowid='id'
+    )
+"""
+
+_INDEX_ROW = "INSERT INTO todos_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);"
+_UNINDEX_ROW = (
+    "INSERT INTO todos_fts (todos_fts, rowid, title, description) "
+    "VALUES ('delete', OLD.id, OLD.title, OLD.description);"
+)
+
+TODO_SEARCH_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos
+    BEGIN {_INDEX_ROW} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos
+    BEGIN {_UNINDEX_ROW} {_INDEX_ROW} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos
+    BEGIN {_UNINDEX_ROW} END""",
+]
+
+# Query-side handle; not part of Base.metadata, so create_all ignores it.
+todos_fts = table("todos_fts", column("rowid"), column("rank"), column("todos_fts"))
+
+_TERM = re.compile(r"\w+")
+
+
+def match_expression(query: str) -> str | None:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    Words are quoted so FTS5 operators and punctuation in user input are
+    never parsed as query syntax. None when the text has no words.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def create_search_index(connection):
+    """Create the FTS table and triggers; index existing rows the first time."""
+    created = not inspect(connection).has_table("todos_fts")
+    connection.exec_driver_sql(TODO_SEARCH_TABLE)
+    for trigger in TODO_SEARCH_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    if created:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    """Re-index every todo from the content table."""
+    connection.exec_driver_sql("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+
+if __name__ == "__main__":
+    from .database import engine
+    from .models import create_schema
+
+    create_schema(engine)
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+        count = connection.exec_driver_sql("SELECT count(*) FROM todos").scalar_one()
+    print(f"Rebuilt todos_fts for {count} todos")
@@ -0,0 +1,147 @@
+"""
+Multi-process serving: `python -m TodoApp.serve --workers 4`.
+
+The parent process imports the app and does the one-time startup
+work (schema, bcrypt calibration, JWT key) once, then binds the socket and
+forks the workers. Workers start from the parent's memory instead of each
+importing the app again, and share its pages copy-on-write; gc.freeze()
+keeps the collector from touching, and so copying, those objects.
+
+Each worker runs its own event loop, lifespan and connection pools (see
+database.dispose_after_fork). Everything else kept in process memory is
+per worker too: /metrics and /admin/stats describe the worker that answered,
+and the login rate limits apply per worker. The todo cache is turned off
+with more than one worker, since a worker can't see another's writes.
+
+POSIX only (it relies on fork). The parent restarts workers that die and
+forwards SIGINT / SIGTERM to them for a graceful shutdown.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+logger = logging.getLogger("TodoApp.serve")
+
+# A worker that dies sooner than this after starting is failing at startup;
+# restarting it would only loop.
+MIN_WORKER_UPTIME = 5.0
+
+
+def preload(workers: int):
+    """Import the app and do the startup work every worker would repeat."""
+    from .cache import InMemoryCache, todo_cache
+    from .database import engine
+    from .main import app
+    from .models import create_schema
+    from .passwords import password_hasher
+    from .routers import auth
+
+    auth.get_signing_key()
+    create_schema(engine)
+    engine.dispose()
+    # One cost for every worker; otherwise each would calibrate to a slightly
+    # different cost and keep rehashing passwords hashed by the others.
+    password_hasher.calibrate()
+    password_hasher.rounds_pinned = True
+    if workers > 1 and isinstance(todo_cache.backend, InMemoryCache):
+        todo_cache.backend.maxsize = 0
+    return app
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    # Own process group: a Ctrl-C in the terminal reaches only the parent,
+    # which stops the workers one signal each.
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int, log_level: str = "info") -> int:
+    app = preload(workers)
+    sock = bind_socket(host, port)
+    logger.info("Serving on %s:%d with %d workers", host, port, workers)
+    gc.freeze()
+
+    children: dict[int, float] = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, log_level)
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    exit_code = 0
+    while children:
+        pid, status = os.wait()
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            logger.error("Worker %d failed at startup; shutting down", pid)
+            exit_code = 1
+            stop(signal.SIGTERM, None)
+            continue
+        logger.warning(
+            "Worker %d exited (status %d); starting a new one",
+            pid,
+            os.waitstatus_to_exitcode(status),
+        )
+        spawn()
+    sock.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    # Before anything is imported: settings are read at import time.
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    sys.exit(serve(args.host, args.port, args.workers, args.log_level))
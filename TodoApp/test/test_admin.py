@@ -1,7 +1,9 @@
+import json
 from .utils import *
 from ..routers.admin import get_db, get_current_user
 from fastapi import status
 from ..models import Todos
+from ..pagination import MAX_PAGE_SIZE, encode_cursor
 
 app.dependency_overrides[get_db] = override_get_db
 app.dependency_overrides[get_current_user] = override_get_current_user
@@ -14,21 +16,72 @@ def test_admin_read_all_authenticated(test_todo):
                                 'priority': 5, 'owner_id': 1}]
 
 
+def test_admin_read_all_caps_page_size(test_todo):
+    db = TestingSessionLocal()
+    db.add_all([Todos(title=f"Todo {i}", priority=1, owner_id=2) for i in range(MAX_PAGE_SIZE)])
+    db.commit()
+    db.close()
+
+    response = client.get("/admin/todo?limit=1000")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == MAX_PAGE_SIZE
+    assert "next" in response.links
+
+
+def test_admin_export_todos(test_todo):
+    db = TestingSessionLocal()
+    db.add_all([Todos(title=f"Todo {i}", priority=1, owner_id=2) for i in range(3)])
+    db.commit()
+    db.close()
+
+    response = client.get("/admin/todo/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [1, 2, 3, 4]
+    assert rows[0] == {'complete': False, 'title': 'Learn to code!',
+                       'description': 'Need to learn everyday!', 'id': 1,
+                       'priority': 5, 'owner_id': 1}
+
+
 def test_admin_delete_todo(test_todo):
-    response = client.delete("/admin/todo/1")
+    with captured_queries() as queries:
+        response = client.delete("/admin/todo/1")
     assert response.status_code == 204
+    assert len(queries) == 1
 
     db = TestingSessionLocal()
     model = db.query(Todos).filter(Todos.id == 1).first()
     assert model is None
 
 
+def test_admin_delete_todo_invalidates_owner_etag(test_todo):
+    etag = client.get("/todos/").headers["etag"]
+    assert client.get("/todos/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.delete("/admin/todo/1")
+
+    response = client.get("/todos/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
 def test_admin_delete_todo_not_found():
     response = client.delete("/admin/todo/9999")
     assert response.status_code == 404
     assert response.json() == {'detail': 'Todo not found'}
 
 
+def test_admin_read_stats():
+    response = client.get("/admin/stats")
+    assert response.status_code == 200
+    assert "password_hasher" in response.json()
+    assert response.json()["password_hasher"]["rejected"] == 0
+    assert "todo_cache" in response.json()
+
+
+
+
 
 
 
@@ -37,3 +90,7 @@ def test_admin_delete_todo_not_found():
 
 
 
+def test_admin_read_all_rejects_cursor_beyond_64_bits(test_todo):
+    response = client.get(f"/admin/todo?after={encode_cursor(2**63)}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,74 @@
+import pytest
+from fastapi import HTTPException
+from .utils import *
+from ..admission import LoginAdmission, TokenBucketLimiter
+from ..database import get_db
+from ..routers import auth
+
+app.dependency_overrides[get_db] = override_get_db
+
+
+def test_token_bucket_allows_burst_then_refills():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    assert limiter.acquire("ip", now=0) == 0
+    assert limiter.acquire("ip", now=0) == 0
+    assert limiter.acquire("ip", now=0) == pytest.approx(1)
+    assert limiter.acquire("ip", now=1) == 0
+    assert limiter.rejected == 1
+
+
+def test_token_bucket_evicts_idle_and_bounds_size():
+    limiter = TokenBucketLimiter(rate=1, burst=2, maxsize=2)
+    limiter.acquire("a", now=0)
+    limiter.acquire("b", now=1)
+    # "a" has been idle for burst / rate seconds: it is full again, so dropped.
+    limiter.acquire("c", now=2)
+    assert len(limiter) == 2
+    limiter.acquire("d", now=2.5)
+    assert len(limiter) == 2
+
+
+def test_admission_sheds_when_too_many_in_flight():
+    admission = LoginAdmission(per_ip=None, per_username=None, max_in_flight=1)
+    with admission.admit("rostami", "1.2.3.4"):
+        with pytest.raises(HTTPException) as excinfo:
+            with admission.admit("other", "5.6.7.8"):
+                pass
+    assert excinfo.value.status_code == 503
+    assert admission.in_flight == 0
+    assert admission.shed == 1
+
+
+@pytest.fixture
+def strict_admission():
+    original = auth.login_admission
+    auth.login_admission = LoginAdmission(
+        per_ip=TokenBucketLimiter(rate=0.01, burst=3),
+        per_username=TokenBucketLimiter(rate=0.01, burst=2),
+        max_in_flight=4,
+    )
+    yield auth.login_admission
+    auth.login_admission = original
+
+
+def test_login_rate_limited_per_username(test_user, strict_admission):
+    form = {"username": "rostami", "password": "wrongpassword"}
+    assert client.post("/auth/token", data=form).status_code == 401
+    assert client.post("/auth/token", data=form).status_code == 401
+
+    with captured_queries() as queries:
+        response = client.post("/auth/token", data={**form, "username": "ROSTAMI"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+    # Rejected before the user lookup and bcrypt.
+    assert queries == []
+
+
+def test_login_rate_limited_per_ip(test_user, strict_admission):
+    for username in ("a", "b", "c"):
+        client.post("/auth/token", data={"username": username, "password": "x"})
+    response = client.post(
+        "/auth/token", data={"username": "rostami", "password": "testpassword"}
+    )
+    assert response.status_code == 429
+    assert strict_admission.stats()["ip_rejected"] == 1
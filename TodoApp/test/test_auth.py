@@ -1,5 +1,8 @@
 from .utils import *
-from ..routers.auth import get_db, authenticate_user, create_access_token, SECRET_KEY, ALGORITHM, get_current_user
+from ..routers.auth import get_db, authenticate_user, create_access_token, get_secret_key, ALGORITHM, get_current_user, token_cache
+from ..models import RefreshToken, Users
+from ..passwords import PasswordHasherBusy, hash_password, hash_rounds, password_hasher
+from ..token_cache import VerifiedTokenCache
 from jose import jwt
 from datetime import timedelta
 import pytest
@@ -7,18 +10,18 @@ from fastapi import HTTPException
 
 app.dependency_overrides[get_db] = override_get_db
 
-def test_authenticate_user(test_user):
-    db = TestingSessionLocal()
-
-    authenticated_user = authenticate_user(test_user.username, 'testpassword', db)
-    assert authenticated_user is not None
-    assert authenticated_user.username == test_user.username
+@pytest.mark.asyncio
+async def test_authenticate_user(test_user):
+    async with TestingAsyncSessionLocal() as db:
+        authenticated_user = await authenticate_user(test_user.username, 'testpassword', db)
+        assert authenticated_user is not None
+        assert authenticated_user.username == test_user.username
 
-    non_existent_user = authenticate_user('WrongUserName', 'testpassword', db)
-    assert non_existent_user is None
+        non_existent_user = await authenticate_user('WrongUserName', 'testpassword', db)
+        assert non_existent_user is None
 
-    wrong_password_user = authenticate_user(test_user.username, 'wrongpassword', db)
-    assert wrong_password_user is None
+        wrong_password_user = await authenticate_user(test_user.username, 'wrongpassword', db)
+        assert wrong_password_user is None
 
 
 def test_create_access_token():
@@ -29,7 +32,7 @@ def test_create_access_token():
 
     token = create_access_token(username, user_id, role, expires_delta)
 
-    decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM],
+    decoded_token = jwt.decode(token, get_secret_key(), algorithms=[ALGORITHM],
                                options={'verify_signature': False})
 
     assert decoded_token['sub'] == username
@@ -40,7 +43,7 @@ def test_create_access_token():
 @pytest.mark.asyncio
 async def test_get_current_user_valid_token():
     encode = {'sub': 'testuser', 'id': 1, 'role': 'admin'}
-    token = jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+    token = jwt.encode(encode, get_secret_key(), algorithm=ALGORITHM)
 
     user = await get_current_user(token=token)
     assert user == {'username': 'testuser', 'id': 1, 'user_role': 'admin'}
@@ -49,7 +52,7 @@ async def test_get_current_user_valid_token():
 @pytest.mark.asyncio
 async def test_get_current_user_missing_payload():
     encode = {'role': 'user'}
-    token = jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+    token = jwt.encode(encode, get_secret_key(), algorithm=ALGORITHM)
 
     with pytest.raises(HTTPException) as excinfo:
         await get_current_user(token=token)
@@ -58,8 +61,189 @@ async def test_get_current_user_missing_payload():
     assert excinfo.value.detail == 'Could not validate credentials'
 
 
+@pytest.mark.asyncio
+async def test_get_current_user_caches_verified_token():
+    token_cache.clear()
+    token = create_access_token('testuser', 1, 'user', timedelta(minutes=5))
+
+    first = await get_current_user(token=token)
+    second = await get_current_user(token=token)
+
+    assert first == second == {'username': 'testuser', 'id': 1, 'user_role': 'user'}
+    assert token_cache.hits == 1
+    assert token_cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_expired_cached_token():
+    token_cache.clear()
+    token = create_access_token('testuser', 1, 'user', timedelta(minutes=5))
+    await get_current_user(token=token)
+
+    # Force the cached entry past its expiry; jwt.decode must run again.
+    key, (_, claims) = next(iter(token_cache._entries.items()))
+    token_cache._entries[key] = (0, claims)
+    assert token_cache.get(token) is None
+    assert len(token_cache) == 0
+
+
+def test_verified_token_cache_is_bounded():
+    cache = VerifiedTokenCache(maxsize=2)
+    cache.put('a', {'id': 1})
+    cache.put('b', {'id': 2})
+    cache.get('a')
+    cache.put('c', {'id': 3})
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == {'id': 1}
+    assert cache.get('c') == {'id': 3}
+
+
+def login(username='rostami', password='testpassword'):
+    response = client.post('/auth/token', data={'username': username, 'password': password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_issues_refresh_token(test_user, unlimited_logins):
+    tokens = login()
+    assert tokens['refresh_token']
+
+    db = TestingSessionLocal()
+    stored = db.query(RefreshToken).one()
+    db.close()
+    # Only the HMAC is stored.
+    assert stored.token_hash != tokens['refresh_token']
+    assert stored.owner_id == test_user.id
+    assert stored.revoked_at is None
+
+
+def test_refresh_rotates_token(test_user, unlimited_logins):
+    tokens = login()
+
+    with assert_max_queries(4):
+        response = client.post('/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed['refresh_token'] != tokens['refresh_token']
+    claims = jwt.decode(refreshed['access_token'], get_secret_key(), algorithms=[ALGORITHM])
+    assert claims['sub'] == 'rostami'
+    assert claims['id'] == test_user.id
+
+    response = client.post('/auth/refresh', json={'refresh_token': refreshed['refresh_token']})
+    assert response.status_code == 200
+
+
+def test_refresh_token_reuse_revokes_family(test_user, unlimited_logins):
+    tokens = login()
+    other_session = login()
+    refreshed = client.post('/auth/refresh', json={'refresh_token': tokens['refresh_token']}).json()
+
+    # The rotated-out token is presented again: someone else holds a copy.
+    response = client.post('/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401
+    response = client.post('/auth/refresh', json={'refresh_token': refreshed['refresh_token']})
+    assert response.status_code == 401
+
+    # Other logins are separate families and keep working.
+    response = client.post('/auth/refresh', json={'refresh_token': other_session['refresh_token']})
+    assert response.status_code == 200
+
+
+def test_revoke_refresh_token(test_user, unlimited_logins):
+    tokens = login()
+    refreshed = client.post('/auth/refresh', json={'refresh_token': tokens['refresh_token']}).json()
+
+    response = client.post('/auth/revoke', json={'refresh_token': refreshed['refresh_token']})
+    assert response.status_code == 204
+    response = client.post('/auth/refresh', json={'refresh_token': refreshed['refresh_token']})
+    assert response.status_code == 401
+
+    # Unknown tokens are accepted silently.
+    response = client.post('/auth/revoke', json={'refresh_token': 'unknown'})
+    assert response.status_code == 204
+
+
+def test_login_prunes_expired_refresh_tokens(test_user, unlimited_logins):
+    login()
+    revoked = login()
+    client.post('/auth/revoke', json={'refresh_token': revoked['refresh_token']})
+    db = TestingSessionLocal()
+    db.query(RefreshToken).update({RefreshToken.expires_at: 0})
+    db.commit()
+
+    fresh = login()
+    stored = db.query(RefreshToken).all()
+    db.close()
+    assert len(stored) == 1
+    assert stored[0].revoked_at is None
+    response = client.post('/auth/refresh', json={'refresh_token': fresh['refresh_token']})
+    assert response.status_code == 200
+
+
+def test_refresh_rejects_expired_and_unknown_tokens(test_user, unlimited_logins):
+    tokens = login()
+    db = TestingSessionLocal()
+    db.query(RefreshToken).update({RefreshToken.expires_at: 0})
+    db.commit()
+    db.close()
+
+    response = client.post('/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401
+    assert response.json() == {'detail': 'Invalid refresh token'}
+    response = client.post('/auth/refresh', json={'refresh_token': 'unknown'})
+    assert response.status_code == 401
+
+
+def weaken_password_hash(user_id):
+    db = TestingSessionLocal()
+    db.get(Users, user_id).hashed_password = hash_password('testpassword', rounds=4)
+    db.commit()
+    db.close()
+
+
+def stored_rounds(user_id):
+    db = TestingSessionLocal()
+    rounds = hash_rounds(db.get(Users, user_id).hashed_password)
+    db.close()
+    return rounds
+
+
+@pytest.fixture
+def hash_cost_10():
+    original = password_hasher.rounds
+    password_hasher.rounds = 10
+    yield
+    password_hasher.rounds = original
+
+
+def test_login_rehashes_password_at_current_cost(test_user, unlimited_logins, hash_cost_10):
+    weaken_password_hash(test_user.id)
+    with assert_max_queries(4):
+        login()
+    assert stored_rounds(test_user.id) == 10
+
+    # The upgraded hash still verifies, and is left alone from now on.
+    with assert_max_queries(3):
+        login()
+
 
+def test_login_never_downgrades_password_hash(test_user, unlimited_logins, hash_cost_10):
+    assert hash_rounds(test_user.hashed_password) == 12
+    with assert_max_queries(3):
+        login()
+    assert stored_rounds(test_user.id) == 12
 
 
+def test_login_skips_rehash_when_hasher_busy(
+    test_user, unlimited_logins, hash_cost_10, monkeypatch
+):
+    weaken_password_hash(test_user.id)
 
+    async def busy(password):
+        raise PasswordHasherBusy()
 
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+    login()
+    assert stored_rounds(test_user.id) == 4
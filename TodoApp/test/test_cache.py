@@ -0,0 +1,60 @@
+import pytest
+from ..cache import InMemoryCache, TodoCache, in_process_cache_size
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryCache(maxsize=2, ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_expires_entries():
+    cache = InMemoryCache(maxsize=10, ttl=60)
+    await cache.set("a", 1, ttl=0)
+    assert await cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_todo_cache_invalidate_drops_owner_pages_and_items():
+    cache = TodoCache(InMemoryCache())
+    page_key = await cache.list_key(1, "limit=10")
+    other_key = await cache.list_key(2, "limit=10")
+    await cache.set(page_key, "page")
+    await cache.set(other_key, "other")
+    await cache.set(await cache.item_key(1, 5), "item")
+
+    await cache.invalidate(1)
+
+    assert await cache.list_key(1, "limit=10") != page_key
+    assert await cache.get(await cache.list_key(1, "limit=10")) is None
+    assert await cache.get(await cache.item_key(1, 5)) is None
+    assert await cache.get(await cache.list_key(2, "limit=10")) == "other"
+
+
+@pytest.mark.asyncio
+async def test_todo_cache_fill_racing_a_write_is_never_read():
+    cache = TodoCache(InMemoryCache())
+    # A reader takes its key and reads the row; a write commits and
+    # invalidates; only then does the reader store what it read.
+    item_key = await cache.item_key(1, 5)
+    await cache.invalidate(1)
+    await cache.set(item_key, "stale")
+
+    assert await cache.get(await cache.item_key(1, 5)) is None
+
+
+def test_in_process_cache_off_with_several_workers(monkeypatch):
+    monkeypatch.setenv("TODO_CACHE_SIZE", "500")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert in_process_cache_size() == 500
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert in_process_cache_size() == 0
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+from ..database import (
+    ENGINE_PROFILES,
+    EngineProfile,
+    apply_engine_profile,
+    _fork_disposed_engines,
+    async_engine,
+    dispose_after_fork_in_child,
+    get_db,
+    read_async_engine,
+    read_only_profile,
+)
+
+
+def test_engine_profile_pragmas():
+    profile = EngineProfile(journal_mode="WAL", busy_timeout=1000)
+    assert profile.pragmas() == ["PRAGMA journal_mode = WAL", "PRAGMA busy_timeout = 1000"]
+    assert ENGINE_PROFILES["default"].pragmas() == []
+
+
+def test_tuned_profile_applied_on_connect():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    apply_engine_profile(engine, ENGINE_PROFILES["tuned"])
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            # NORMAL == 1, MEMORY == 2
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert connection.execute(text("PRAGMA cache_size")).scalar() == -64000
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method, expected_engine",
+    [("GET", read_async_engine), ("HEAD", read_async_engine),
+     ("POST", async_engine), ("PUT", async_engine), ("DELETE", async_engine)],
+)
+async def test_get_db_picks_pool_by_method(method, expected_engine):
+    request = Request({"type": "http", "method": method, "headers": []})
+    sessions = get_db(request)
+    db = await sessions.__anext__()
+    assert db.bind is expected_engine
+    await sessions.aclose()
+
+
+def test_read_only_connections_reject_writes():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    writer = create_engine(f"sqlite:///{path}")
+    apply_engine_profile(writer, ENGINE_PROFILES["tuned"])
+    reader = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    apply_engine_profile(reader, read_only_profile(ENGINE_PROFILES["tuned"]))
+    try:
+        with writer.begin() as connection:
+            connection.execute(text("CREATE TABLE items (name TEXT)"))
+            connection.execute(text("INSERT INTO items VALUES ('one')"))
+        with reader.connect() as connection:
+            assert connection.execute(text("SELECT name FROM items")).scalar() == "one"
+            with pytest.raises(OperationalError):
+                connection.execute(text("INSERT INTO items VALUES ('two')"))
+    finally:
+        reader.dispose()
+        writer.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def test_create_schema_indexes_existing_todos_for_search():
+    from ..database import Base
+    from ..models import create_schema
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO todos (title, priority, owner_id) VALUES ('Old errand', 1, 1)")
+        )
+
+    create_schema(engine)
+    with engine.connect() as connection:
+        matches = connection.execute(
+            text("SELECT rowid FROM todos_fts WHERE todos_fts MATCH 'errand'")
+        ).scalars().all()
+    assert matches == [1]
+    engine.dispose()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_does_not_inherit_pooled_connections(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fork.db'}")
+    apply_engine_profile(engine, ENGINE_PROFILES["tuned"])
+    dispose_after_fork_in_child(engine)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert engine.pool.checkedin() == 1
+
+        pid = os.fork()
+        if pid == 0:
+            # Report through the exit code; never return into pytest here.
+            os._exit(0 if engine.pool.checkedin() == 0 else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        # The parent keeps its own connections.
+        assert engine.pool.checkedin() == 1
+    finally:
+        _fork_disposed_engines.remove(engine)
+        engine.dispose()
@@ -1,9 +1,42 @@
+import os
+import subprocess
+import sys
+import tempfile
 from fastapi.testclient import TestClient
 from ..main import app
 from fastapi import status
 
 client = TestClient(app)
 
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Generous enough for a slow CI machine; startup work belongs in the lifespan.
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", 2.0))
+
+MEASURE_IMPORT = """
+import time
+start = time.perf_counter()
+import TodoApp.main
+print(time.perf_counter() - start)
+"""
+
+RUN_LIFESPAN = """
+from fastapi.testclient import TestClient
+from TodoApp.database import async_engine, read_async_engine
+from TodoApp.main import app
+from TodoApp.passwords import BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS, password_hasher
+from TodoApp.routers import auth
+
+with TestClient(app) as started:
+    assert started.get("/healthy").status_code == 200
+    assert auth.get_signing_key.cache_info().currsize == 1
+    assert BCRYPT_MIN_ROUNDS <= password_hasher.rounds <= BCRYPT_MAX_ROUNDS
+    assert async_engine.sync_engine.pool.checkedin() >= 1
+    assert read_async_engine.sync_engine.pool.checkedin() >= 1
+    # Statements are compiled on the engine that will run them.
+    assert len(async_engine.sync_engine._compiled_cache) >= 1
+    assert len(read_async_engine.sync_engine._compiled_cache) >= 3
+"""
+
 
 def test_return_health_check():
     response = client.get("/healthy")
@@ -11,4 +44,38 @@ def test_return_health_check():
     assert response.json() == {"status": "Healthy"}
 
 
-#
+def test_import_main_within_budget_and_side_effect_free():
+    env = {**os.environ, "PYTHONPATH": PACKAGE_ROOT}
+    # Importing must not need the JWT secret or touch the database.
+    env.pop("JWT_SECRET", None)
+    timings = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(3):
+            result = subprocess.run(
+                [sys.executable, "-c", MEASURE_IMPORT],
+                cwd=cwd,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            assert result.returncode == 0, result.stderr
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+        assert os.listdir(cwd) == []
+    assert min(timings) < IMPORT_TIME_BUDGET, f"import TodoApp.main took {min(timings):.2f}s"
+
+
+def test_lifespan_warms_key_pools_and_statements():
+    # In a fresh interpreter started in a temporary directory: the app's
+    # engines are bound to ./todosapp.db when they are created, and the
+    # lifespan would otherwise migrate the tracked database.
+    env = {**os.environ, "PYTHONPATH": PACKAGE_ROOT, "JWT_SECRET": "lifespan-test"}
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-c", RUN_LIFESPAN],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert os.path.exists(os.path.join(cwd, "todosapp.db"))
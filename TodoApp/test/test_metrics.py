@@ -0,0 +1,65 @@
+import re
+from .utils import *
+from ..database import get_db
+from ..metrics import Histogram
+from ..routers.auth import get_current_user
+
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_current_user] = override_get_current_user
+
+
+def sample(body: str, name: str, **labels) -> float:
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$", body, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, ("/a",))
+    histogram.observe(0.1, ("/a",))
+    histogram.observe(3.0, ("/a",))
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 3.15',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_metrics_record_route_status_and_db_queries(test_todo):
+    labels = {"method": "GET", "route": "/todos/{todo_id}"}
+    names = [
+        ("http_requests_total", {**labels, "status": 200}),
+        ("http_requests_total", {**labels, "status": 404}),
+        ("http_request_duration_seconds_count", labels),
+        ("http_request_db_queries_sum", labels),
+        ("http_request_db_duration_seconds_sum", labels),
+    ]
+    before = client.get("/metrics").text
+
+    assert client.get("/todos/1").status_code == 200
+    assert client.get("/todos/999").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    ok, not_found, count, queries, db_seconds = (
+        sample(response.text, name, **values) - sample(before, name, **values)
+        for name, values in names
+    )
+    assert (ok, not_found, count) == (1, 1, 2)
+    # Each read checks the list version and then loads the todo.
+    assert queries == 4
+    assert db_seconds > 0
+
+
+def test_metrics_label_unknown_paths_as_unmatched():
+    client.get("/no/such/path/123")
+    body = client.get("/metrics").text
+    assert sample(body, "http_requests_total", method="GET", route="unmatched", status=404) >= 1
+    assert "/no/such/path" not in body
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from ..passwords import (
+    BCRYPT_MAX_ROUNDS,
+    BCRYPT_MIN_ROUNDS,
+    PasswordHasher,
+    calibrate_rounds,
+    hash_password,
+    hash_rounds,
+    verify_password,
+)
+
+
+def test_hash_and_verify_password():
+    hashed = hash_password("testpassword")
+    assert verify_password("testpassword", hashed)
+    assert not verify_password("wrongpassword", hashed)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_records_metrics():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    hashed = await hasher.hash("testpassword")
+    assert await hasher.verify("testpassword", hashed)
+    hasher.shutdown()
+
+    snapshot = hasher.metrics.snapshot()
+    assert snapshot["completed"] == 2
+    assert snapshot["rejected"] == 0
+    assert snapshot["avg_hash_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    in_flight = asyncio.ensure_future(hasher.hash("testpassword"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await hasher.hash("otherpassword")
+    assert excinfo.value.status_code == 503
+
+    await in_flight
+    hasher.shutdown()
+    assert hasher.metrics.rejected == 1
+
+
+def test_hash_rounds():
+    assert hash_rounds(hash_password("testpassword", rounds=10)) == 10
+    assert hash_rounds("not a bcrypt hash") is None
+
+
+def test_calibrate_rounds_stays_within_bounds():
+    assert calibrate_rounds(0) == BCRYPT_MIN_ROUNDS
+    assert calibrate_rounds(3600) == BCRYPT_MAX_ROUNDS
+    rounds = calibrate_rounds(0.05, min_rounds=4)
+    assert 4 <= rounds <= BCRYPT_MAX_ROUNDS
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_uses_calibrated_rounds():
+    hasher = PasswordHasher(workers=1, target_seconds=0)
+    assert hasher.calibrate() == BCRYPT_MIN_ROUNDS
+    hashed = await hasher.hash("testpassword")
+    hasher.shutdown()
+    assert hash_rounds(hashed) == BCRYPT_MIN_ROUNDS
+    assert not hasher.needs_rehash(hashed)
+    assert hasher.needs_rehash(hash_password("testpassword", rounds=4))
+    # Stronger hashes are never downgraded.
+    assert not hasher.needs_rehash(hash_password("testpassword", rounds=11))
+
+
+def test_pinned_rounds_skip_calibration():
+    hasher = PasswordHasher(rounds=11, target_seconds=0)
+    assert hasher.calibrate() == 11
@@ -0,0 +1,66 @@
+import logging
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from .utils import TestingAsyncSessionLocal, override_get_db
+from ..database import get_db
+from ..query_budget import QueryBudget, QueryBudgetExceeded, QueryGuard
+
+budget_app = FastAPI()
+budget_app.dependency_overrides[get_db] = override_get_db
+
+
+@budget_app.get("/within", dependencies=[Depends(QueryBudget(2))])
+async def within(db=Depends(get_db)):
+    await db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 2"))
+    return {}
+
+
+@budget_app.get("/over", dependencies=[Depends(QueryBudget(1))])
+async def over(db=Depends(get_db)):
+    await db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 2"))
+    return {}
+
+
+@budget_app.get("/loop")
+async def loop(db=Depends(get_db)):
+    for todo_id in range(5):
+        await db.execute(text("SELECT * FROM todos WHERE id = :id"), {"id": todo_id})
+    return {}
+
+
+budget_client = TestClient(budget_app)
+
+
+def test_route_within_budget():
+    assert budget_client.get("/within").status_code == 200
+
+
+def test_route_over_budget_raises():
+    with pytest.raises(QueryBudgetExceeded, match="GET /over exceeded its budget of 1"):
+        budget_client.get("/over")
+
+
+def test_repeated_statement_flagged_as_n_plus_one():
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        budget_client.get("/loop")
+
+
+@pytest.mark.asyncio
+async def test_log_mode_warns_instead_of_raising(caplog):
+    guard = QueryGuard(mode="log", repeat_limit=2)
+    async with TestingAsyncSessionLocal() as db:
+        with guard.track() as tracker:
+            for _ in range(2):
+                await db.execute(text("SELECT 1"))
+    assert tracker.count == 2
+    assert any("possible N+1" in record.message for record in caplog.records)
+    assert all(record.levelno == logging.WARNING for record in caplog.records)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        QueryGuard(mode="strict")
@@ -0,0 +1,79 @@
+import re
+import pytest
+from .utils import *
+from ..database import get_db
+from ..routers.auth import get_current_user
+
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_current_user] = override_get_current_user
+
+# "SCAN <table>" in a plan means SQLite walks the whole table (or a whole index).
+TABLE_SCAN = re.compile(r"^SCAN (todos|users|todo_list_versions|refresh_tokens)\b")
+
+# Endpoints allowed to walk the table: the export reads every row by design,
+# and the first admin page walks the primary key and stops after `limit` rows.
+ALLOWED_SCANS = {("GET", "/admin/todo/export"), ("GET", "/admin/todo")}
+
+TODO_DATA = {"title": "Plan", "description": "Check", "priority": 3, "complete": False}
+
+def refresh_request():
+    """Body for /auth/refresh carrying a live token; needs a login first."""
+    response = client.post(
+        "/auth/token", data={"username": "rostami", "password": "testpassword"}
+    )
+    return {"json": {"refresh_token": response.json()["refresh_token"]}}
+
+
+ROUTES = [
+    ("GET", "/todos/", {}),
+    ("GET", "/todos/?limit=1&after=aWQ6MQ", {}),
+    ("GET", "/todos/1", {}),
+    ("GET", "/todos/search?q=learn", {}),
+    ("POST", "/todos/", {"json": TODO_DATA}),
+    ("PUT", "/todos/1", {"json": TODO_DATA}),
+    ("DELETE", "/todos/1", {}),
+    ("PUT", "/todos/batch", {"json": [{"id": 1, **TODO_DATA}]}),
+    ("DELETE", "/todos/batch", {"json": {"ids": [1, 2]}}),
+    ("GET", "/admin/todo", {}),
+    ("GET", "/admin/todo?after=aWQ6MQ", {}),
+    ("GET", "/admin/todo/export", {}),
+    ("DELETE", "/admin/todo/1", {}),
+    ("GET", "/user/", {}),
+    ("PUT", "/user/password", {"json": {"password": "testpassword", "new_password": "newpassword"}}),
+    ("POST", "/auth/token", {"data": {"username": "rostami", "password": "testpassword"}}),
+    ("POST", "/auth/refresh", refresh_request),
+    ("POST", "/auth/revoke", {"json": {"refresh_token": "unknown"}}),
+]
+
+
+def query_plan(statement, parameters):
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("method, url, kwargs", ROUTES)
+def test_route_queries_use_indexes(
+    test_user, test_todo, unlimited_logins, method, url, kwargs
+):
+    if callable(kwargs):
+        kwargs = kwargs()
+    with captured_queries() as statements:
+        response = client.request(method, url, **kwargs)
+    assert response.status_code < 400
+
+    # executemany parameter lists can't be planned; the statement shape is
+    # checked through the single-row routes.
+    planned = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if isinstance(parameters, tuple)
+        and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+    ]
+    assert statements, "route issued no queries to check"
+    if (method, url) in ALLOWED_SCANS:
+        return
+    for statement, parameters in planned:
+        plan = query_plan(statement, parameters)
+        scans = [step for step in plan if TABLE_SCAN.match(step)]
+        assert not scans, f"{method} {url} scans a table: {statement!r} -> {plan}"
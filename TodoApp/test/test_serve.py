@@ -0,0 +1,52 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import pytest
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(url: str, timeout: float = 10.0) -> bytes:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url) as response:
+                return response.read()
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_serve_forks_workers_and_shuts_down_cleanly():
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": PACKAGE_ROOT, "JWT_SECRET": "serve-test"}
+    with tempfile.TemporaryDirectory() as cwd:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "TodoApp.serve", "--workers", "2",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=cwd,
+            env=env,
+        )
+        try:
+            assert get(f"http://127.0.0.1:{port}/healthy") == b'{"status":"Healthy"}'
+            workers = subprocess.run(
+                ["pgrep", "-P", str(server.pid)], capture_output=True, text=True
+            ).stdout.split()
+            assert len(workers) == 2
+        finally:
+            server.send_signal(signal.SIGINT)
+            assert server.wait(timeout=15) == 0
+        assert not any(os.path.exists(f"/proc/{pid}") for pid in workers)
@@ -3,6 +3,8 @@ from ..routers.auth import get_current_user
 from fastapi import status
 from ..models import Todos
 from .utils import *
+import sqlite3
+from ..pagination import encode_cursor
 
 app.dependency_overrides[get_db] = override_get_db
 app.dependency_overrides[get_current_user] = override_get_current_user
@@ -50,8 +52,11 @@ def test_create_todo(test_todo):
         "complete": False,
     }
 
-    response = client.post("/todos/", json=request_data)
+    with captured_queries() as queries:
+        response = client.post("/todos/", json=request_data)
     assert response.status_code == 201
+    assert len(queries) == 1
+    assert response.json()["id"] == 2
 
     db = TestingSessionLocal()
     model = db.query(Todos).filter(Todos.id == 2).first()
@@ -69,8 +74,10 @@ def test_update_todo(test_todo):
         "complete": False,
     }
 
-    response = client.put("/todos/1", json=request_data)
+    with captured_queries() as queries:
+        response = client.put("/todos/1", json=request_data)
     assert response.status_code == 204
+    assert len(queries) == 1
     db = TestingSessionLocal()
     model = db.query(Todos).filter(Todos.id == 1).first()
     assert model.title == "Change the title of the todo already saved!"
@@ -90,8 +97,10 @@ def test_update_todo_not_found(test_todo):
 
 
 def test_delete_todo(test_todo):
-    response = client.delete("/todos/1")
+    with captured_queries() as queries:
+        response = client.delete("/todos/1")
     assert response.status_code == 204
+    assert len(queries) == 1
     db = TestingSessionLocal()
     model = db.query(Todos).filter(Todos.id == 1).first()
     assert model is None
@@ -101,3 +110,261 @@ def test_delete_todo_not_found():
     response = client.delete("/todos/999")
     assert response.status_code == 404
     assert response.json() == {"detail": "Todo not found"}
+
+
+def test_read_all_paginates_with_next_link(test_todo):
+    db = TestingSessionLocal()
+    db.add_all(
+        [Todos(title=f"Todo {i}", priority=1, owner_id=1) for i in range(2)]
+        + [Todos(title="Someone else's", priority=1, owner_id=2)]
+    )
+    db.commit()
+    db.close()
+
+    response = client.get("/todos/?limit=2")
+    assert response.status_code == status.HTTP_200_OK
+    assert [todo["id"] for todo in response.json()] == [1, 2]
+    next_url = response.links["next"]["url"]
+
+    response = client.get(next_url)
+    assert [todo["id"] for todo in response.json()] == [3]
+    assert "next" not in response.links
+
+
+def test_read_all_invalid_cursor():
+    response = client.get("/todos/?after=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_read_all_rejects_cursor_beyond_64_bits(test_todo):
+    response = client.get(f"/todos/?after={encode_cursor(2**63)}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+    response = client.get(f"/todos/?after={encode_cursor(2**63 - 1)}")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_create_todos_batch(test_todo):
+    request_data = [
+        {"title": f"Batch {i}", "description": "In one go", "priority": 2}
+        for i in range(3)
+    ]
+
+    with assert_max_queries(1):
+        response = client.post("/todos/batch", json=request_data)
+    assert response.status_code == 201
+    assert response.json() == [
+        {"id": todo_id, "status": 201, "detail": None} for todo_id in (2, 3, 4)
+    ]
+
+    db = TestingSessionLocal()
+    titles = [todo.title for todo in db.query(Todos).order_by(Todos.id).all()]
+    assert titles == ["Learn to code!", "Batch 0", "Batch 1", "Batch 2"]
+
+
+def test_create_todos_batch_rejects_oversized_batch():
+    request_data = [{"title": "Too many", "priority": 1}] * 501
+    response = client.post("/todos/batch", json=request_data)
+    assert response.status_code == 422
+
+
+def test_update_todos_batch(test_todo):
+    db = TestingSessionLocal()
+    db.add(Todos(title="Not mine", priority=1, owner_id=2))
+    db.commit()
+
+    request_data = [
+        {"id": 1, "title": "Updated in batch", "priority": 3, "complete": True},
+        {"id": 2, "title": "Should not change", "priority": 3},
+        {"id": 999, "title": "Missing", "priority": 3},
+    ]
+    response = client.put("/todos/batch", json=request_data)
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()] == [204, 404, 404]
+
+    db.expire_all()
+    assert db.query(Todos).filter(Todos.id == 1).first().title == "Updated in batch"
+    assert db.query(Todos).filter(Todos.id == 2).first().title == "Not mine"
+
+
+def test_update_todos_batch_not_raced_by_delete(test_todo):
+    # Try to delete the todo from another connection right after the
+    # ownership check; it must wait for the batch update, not slip between.
+    delete_outcome = []
+
+    def delete_after_check(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT todos.id") and not delete_outcome:
+            other = sqlite3.connect(TEST_DATABASE_PATH, timeout=0.2)
+            try:
+                other.execute("DELETE FROM todos WHERE id = 1")
+                other.commit()
+                delete_outcome.append("deleted")
+            except sqlite3.OperationalError:
+                delete_outcome.append("blocked")
+            finally:
+                other.close()
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", delete_after_check)
+    try:
+        response = client.put(
+            "/todos/batch", json=[{"id": 1, "title": "Raced", "priority": 3}]
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "after_cursor_execute", delete_after_check)
+
+    assert delete_outcome == ["blocked"]
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "status": 204, "detail": None}]
+    db = TestingSessionLocal()
+    assert db.query(Todos).filter(Todos.id == 1).first().title == "Raced"
+    db.close()
+
+
+def test_delete_todos_batch(test_todo):
+    db = TestingSessionLocal()
+    db.add(Todos(title="Not mine", priority=1, owner_id=2))
+    db.commit()
+
+    response = client.request("DELETE", "/todos/batch", json={"ids": [1, 2, 999]})
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()] == [204, 404, 404]
+
+    db.expire_all()
+    assert db.query(Todos).filter(Todos.id == 1).first() is None
+    assert db.query(Todos).filter(Todos.id == 2).first() is not None
+
+
+def test_read_all_not_modified_skips_todos_table(test_todo):
+    response = client.get("/todos/")
+    etag = response.headers["etag"]
+    asyncio.run(todo_cache.clear())
+
+    with captured_queries() as queries:
+        response = client.get("/todos/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert len(queries) == 1
+    assert "todo_list_versions" in queries[0][0]
+
+
+def test_etag_changes_after_write(test_todo):
+    list_etag = client.get("/todos/").headers["etag"]
+    todo_etag = client.get("/todos/1").headers["etag"]
+    assert list_etag != todo_etag
+
+    client.put("/todos/1", json={"title": "Changed", "priority": 1})
+
+    response = client.get("/todos/", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != list_etag
+    response = client.get("/todos/1", headers={"If-None-Match": todo_etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Changed"
+
+
+def test_if_none_match_any_does_not_hide_missing_todo(test_todo):
+    db = TestingSessionLocal()
+    db.add(Todos(title="Not mine", priority=1, owner_id=2))
+    db.commit()
+    db.close()
+
+    for todo_id in (999, 2):
+        response = client.get(f"/todos/{todo_id}", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+    response = client.get("/todos/1", headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+
+
+def test_read_all_served_from_cache(test_todo):
+    first = client.get("/todos/")
+
+    with captured_queries() as queries:
+        response = client.get("/todos/")
+    assert response.status_code == 200
+    assert response.json() == first.json()
+    assert response.headers["etag"] == first.headers["etag"]
+    assert queries == []
+
+    with captured_queries() as queries:
+        response = client.get("/todos/", headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+    assert queries == []
+
+
+def test_cached_todo_invalidated_by_delete(test_todo):
+    assert client.get("/todos/1").status_code == 200
+    assert len(client.get("/todos/").json()) == 1
+
+    client.delete("/todos/1")
+
+    assert client.get("/todos/1").status_code == 404
+    assert client.get("/todos/").json() == []
+
+
+def add_todos(*todos):
+    db = TestingSessionLocal()
+    db.add_all(Todos(priority=3, complete=False, **todo) for todo in todos)
+    db.commit()
+    db.close()
+
+
+def test_search_todos_ranks_owner_matches(test_todo):
+    add_todos(
+        {"title": "Groceries", "description": "milk and learning snacks", "owner_id": 1},
+        {"title": "Learn Rust, learn Go", "description": "learn more", "owner_id": 1},
+        {"title": "Learn to cook", "description": None, "owner_id": 2},
+    )
+
+    response = client.get("/todos/search", params={"q": "learn"})
+    assert response.status_code == 200
+    titles = [todo["title"] for todo in response.json()]
+    assert titles[0] == "Learn Rust, learn Go"
+    assert set(titles) == {"Learn Rust, learn Go", "Learn to code!", "Groceries"}
+
+
+def test_search_todos_paginates(test_todo):
+    add_todos(*({"title": f"Learn topic {i}", "owner_id": 1} for i in range(4)))
+
+    ids = []
+    url = "/todos/search?q=learn&limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        ids.extend(todo["id"] for todo in response.json())
+        url = response.links.get("next", {}).get("url")
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+
+
+def test_search_todos_follows_writes(test_todo):
+    client.put("/todos/1", json={"title": "Write report", "priority": 2})
+    assert client.get("/todos/search", params={"q": "learn"}).json() == []
+    assert [t["id"] for t in client.get("/todos/search", params={"q": "rep"}).json()] == [1]
+
+    client.delete("/todos/1")
+    assert client.get("/todos/search", params={"q": "report"}).json() == []
+
+
+def test_search_todos_treats_operators_as_text(test_todo):
+    response = client.get("/todos/search", params={"q": 'learn" OR NEAR(*'})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = client.get("/todos/search", params={"q": "!!!"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_search_rejects_offset_cursor_beyond_64_bits(test_todo):
+    response = client.get(
+        f"/todos/search?q=learn&after={encode_cursor(2**63, kind='offset')}"
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+    response = client.get(
+        f"/todos/search?q=learn&after={encode_cursor(2**63 - 1, kind='offset')}"
+    )
+    assert response.status_code == 200
+    assert response.json() == []
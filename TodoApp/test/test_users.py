@@ -14,6 +14,7 @@ def test_return_user(test_user):
     assert response.json()["first_name"] == "hossein"
     assert response.json()["last_name"] == "rostami"
     assert response.json()["role"] == "admin"
+    assert "hashed_password" not in response.json()
 
 
 def test_change_password_success(test_user):
@@ -37,3 +38,19 @@ def test_change_password_invalid_current_password(test_user):
 # def test_change_phone_number_success(test_user):
 #     response = client.put("/user/phonenumber/2222222222")
 #     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_change_password_revokes_refresh_tokens(test_user, unlimited_logins):
+    tokens = client.post(
+        "/auth/token", data={"username": "rostami", "password": "testpassword"}
+    ).json()
+    response = client.put(
+        "/user/password",
+        json={"password": "testpassword", "new_password": "newpassword"},
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,32 +1,62 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.pool import StaticPool
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from ..database import Base
 from ..main import app
+from ..metrics import instrument_engine
+from ..query_budget import query_guard, track_queries
+from fastapi import Request
 from fastapi.testclient import TestClient
 import pytest
-from ..models import Todos, Users
+from ..cache import todo_cache
+from ..models import Todos, Users, create_schema
+from ..admission import LoginAdmission
+from ..routers import auth
 from ..routers.auth import hash_password
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# The app talks to the database through an async engine while fixtures and
+# assertions use a sync one, so both must point at the same (file) database.
+# A directory of its own per test run, so concurrent runs never share a file.
+TEST_DATABASE_DIR = tempfile.mkdtemp(prefix="todoapp-test-")
+atexit.register(shutil.rmtree, TEST_DATABASE_DIR, ignore_errors=True)
+TEST_DATABASE_PATH = os.path.join(TEST_DATABASE_DIR, "testdb.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+instrument_engine(async_engine.sync_engine)
+track_queries(async_engine.sync_engine)
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
-Base.metadata.create_all(bind=engine)
+Base.metadata.drop_all(bind=engine)
+with engine.begin() as connection:
+    # Not in Base.metadata, so drop_all leaves it behind.
+    connection.exec_driver_sql("DROP TABLE IF EXISTS todos_fts")
+create_schema(engine)
 
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Route query budgets and repeated statements fail the test instead of logging.
+query_guard.mode = "raise"
+
+
+async def override_get_db(request: Request):
+    async with TestingAsyncSessionLocal() as db:
+        with query_guard.track(request):
+            yield db
 
 
 def override_get_current_user():
@@ -36,6 +66,32 @@ def override_get_current_user():
 client = TestClient(app)
 
 
+@contextmanager
+def captured_queries():
+    """Collect (statement, parameters) for every query the app runs in the block."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the app runs more than `limit` queries in the block."""
+    with captured_queries() as statements:
+        yield statements
+    assert len(statements) <= limit, (
+        f"{len(statements)} queries, expected at most {limit}:\n"
+        + "\n".join(statement for statement, _ in statements)
+    )
+
+
 @pytest.fixture
 def test_todo():
     todo = Todos(
@@ -50,11 +106,13 @@ def test_todo():
     db.add(todo)
     db.commit()
     db.refresh(todo)
+    asyncio.run(todo_cache.clear())
     yield todo
     db.close()
-    # Clean up for in-memory database
+    # Clean up the test database
     with engine.begin() as connection:
         connection.execute(text("DELETE FROM todos;"))
+    asyncio.run(todo_cache.clear())
 
 
 @pytest.fixture
@@ -73,6 +131,16 @@ def test_user():
     db.refresh(user)
     yield user
     db.close()
-    # Clean up for in-memory database
+    # Clean up the test database
     with engine.begin() as connection:
+        connection.execute(text("DELETE FROM refresh_tokens;"))
         connection.execute(text("DELETE FROM users;"))
+
+
+@pytest.fixture
+def unlimited_logins():
+    """Lift the login rate limits for tests that log in repeatedly."""
+    original = auth.login_admission
+    auth.login_admission = LoginAdmission(None, None, original.max_in_flight)
+    yield
+    auth.login_admission = original
@@ -0,0 +1,59 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of claims from tokens that already passed signature and
+    expiry checks, keyed by the SHA-256 digest of the raw token.
+    An entry is dropped once the token's `exp` passes; tokens without `exp`
+    are kept for at most `max_ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int = 10_000, max_ttl: float = 20 * 60):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: dict, exp: float | None = None):
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        expires_at = now + self.max_ttl if exp is None else min(exp, now + self.max_ttl)
+        if expires_at <= now:
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, dict(claims))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
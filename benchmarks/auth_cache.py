@@ -0,0 +1,46 @@
+"""Per-request cost of get_current_user with and without the verified-JWT cache.
+
+Usage: python -m benchmarks.auth_cache [--requests 50000] [--tokens 100]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from .common import app  # noqa: F401  (sets JWT_SECRET before auth is imported)
+from TodoApp.routers import auth
+
+
+async def measure(tokens: list[str], total: int) -> float:
+    start = time.perf_counter()
+    for i in range(total):
+        await auth.get_current_user(token=tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / total
+
+
+async def main(total: int, token_count: int):
+    tokens = [
+        auth.create_access_token(f"user{i}", i, "user", timedelta(minutes=20))
+        for i in range(token_count)
+    ]
+    original = auth.token_cache
+    try:
+        auth.token_cache = auth.VerifiedTokenCache(maxsize=0)
+        uncached = await measure(tokens, total)
+        auth.token_cache = auth.VerifiedTokenCache(maxsize=token_count)
+        cached = await measure(tokens, total)
+    finally:
+        auth.token_cache = original
+
+    print(f"without cache: {uncached * 1e6:8.2f} us/request")
+    print(f"with cache:    {cached * 1e6:8.2f} us/request")
+    print(f"speedup:       {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.tokens))
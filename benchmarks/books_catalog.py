@@ -0,0 +1,115 @@
+"""Lookup, update and delete cost of the Books catalog store against the old list scans.
+
+Usage: python -m benchmarks.books_catalog [--books 1000000] [--ops 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Books/ is run as a directory of scripts (books2.py does `import books`),
+# not as a package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Books"))
+
+from books2 import Book  # noqa: E402
+from catalog import BookCatalog  # noqa: E402
+
+
+def make_books(count: int) -> list[Book]:
+    return [
+        Book(
+            id=i,
+            title=f"Title {i}",
+            author=f"Author {i % 1000}",
+            description=f"Description {i}",
+            rating=i % 5 + 1,
+            published_date=2000 + i % 31,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+# The pre-catalog implementations from books2.py, operating on a plain list.
+def list_get(books: list[Book], book_id: int):
+    for book in books:
+        if book.id == book_id:
+            return book
+
+
+def list_by_published_date(books: list[Book], published_date: int):
+    return [book for book in books if book.published_date == published_date]
+
+
+def list_update(books: list[Book], updated: Book):
+    for i in range(len(books)):
+        if books[i].id == updated.id:
+            books[i] = updated
+            return
+
+
+def list_delete(books: list[Book], book_id: int):
+    for i in range(len(books)):
+        if books[i].id == book_id:
+            books.pop(i)
+            return
+
+
+def per_op(ops: int, func, args: list) -> float:
+    start = time.perf_counter()
+    for arg in args[:ops]:
+        func(arg)
+    return (time.perf_counter() - start) / ops
+
+
+def main(count: int, ops: int):
+    books = make_books(count)
+    start = time.perf_counter()
+    catalog = BookCatalog(make_books(count))
+    build = time.perf_counter() - start
+
+    ids = random.sample(range(1, count + 1), ops)
+    dates = [2000 + i % 31 for i in range(ops)]
+
+    def replacement(book_id: int) -> Book:
+        return Book(book_id, "Updated", "Author", "Updated", 5, 2030)
+
+    rows = [
+        (
+            "get by id",
+            per_op(ops, lambda i: list_get(books, i), ids),
+            per_op(ops, catalog.get, ids),
+        ),
+        (
+            "by published_date",
+            per_op(ops, lambda d: list_by_published_date(books, d), dates),
+            per_op(ops, catalog.by_published_date, dates),
+        ),
+        (
+            "update",
+            per_op(ops, lambda i: list_update(books, replacement(i)), ids),
+            per_op(ops, lambda i: catalog.replace(replacement(i)), ids),
+        ),
+        (
+            "delete",
+            per_op(ops, lambda i: list_delete(books, i), ids),
+            per_op(ops, catalog.remove, ids),
+        ),
+    ]
+
+    print(f"{count} books (catalog built in {build:.2f} s)")
+    print(f"{'operation':<18} {'list ms/op':>11} {'catalog ms/op':>14} {'speedup':>9}")
+    for name, scan, indexed in rows:
+        print(
+            f"{name:<18} {scan * 1000:>11.3f} {indexed * 1000:>14.4f} "
+            f"{scan / indexed:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=20)
+    args = parser.parse_args()
+    main(args.books, args.ops)
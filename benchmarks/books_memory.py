@@ -0,0 +1,87 @@
+"""Memory and filter latency of the slotted books2 Book against the old __dict__ class.
+
+Usage: python -m benchmarks.books_memory [--books 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Books/ is run as a directory of scripts, not as a package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Books"))
+
+from books2 import Book  # noqa: E402
+from catalog import BookCatalog  # noqa: E402
+
+
+class DictBook:
+    """The pre-slots Book from books2.py."""
+
+    def __init__(self, id, title, author, description, rating, published_date):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.description = description
+        self.rating = rating
+        self.published_date = published_date
+
+
+def build(cls, count: int) -> list:
+    return [
+        cls(
+            i,
+            f"Title {i}",
+            # Built per book, as request bodies would be; Book interns it.
+            f"Author {i % 1000}",
+            f"Description {i}",
+            i % 5 + 1,
+            2000 + i % 31,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(func):
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(count: int):
+    old_books, old_bytes = measure(lambda: build(DictBook, count))
+    new_books, new_bytes = measure(lambda: build(Book, count))
+    catalog, catalog_bytes = measure(lambda: BookCatalog(new_books))
+
+    old_scan = best_of(3, lambda: [b for b in old_books if b.rating == 3])
+    new_scan = best_of(3, lambda: [b for b in new_books if b.rating == 3])
+    indexed = best_of(3, lambda: catalog.by_rating(3))
+
+    print(f"{count} books")
+    print(f"__dict__ objects:  {old_bytes / count:8.1f} bytes/book")
+    print(f"slotted objects:   {new_bytes / count:8.1f} bytes/book")
+    print(f"catalog indexes:   {catalog_bytes / count:8.1f} bytes/book on top")
+    print(f"rating filter, __dict__ scan: {old_scan * 1000:8.2f} ms")
+    print(f"rating filter, slotted scan:  {new_scan * 1000:8.2f} ms")
+    print(f"rating filter, catalog index: {indexed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+    main(args.books)
@@ -0,0 +1,167 @@
+"""Title, category and prefix lookups of the books.py title catalog against list scans.
+
+Usage: python -m benchmarks.books_titles [--books 1000000] [--ops 20] [--writes 2000]
+
+Before timing, a random mix of adds, replaces and removes is applied to both
+a TitleCatalog and a plain list, and every lookup is checked to give the
+same answer, so the indexes are shown to stay consistent through writes.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Books/ is run as a directory of scripts, not as a package.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Books"))
+
+from catalog import TitleCatalog  # noqa: E402
+
+CATEGORIES = ["science", "history", "math", "art", "poetry"]
+
+
+def make_book(i: int) -> dict:
+    return {
+        "title": f"Title {i:07d}",
+        "author": f"Author {i % 1000}",
+        "category": CATEGORIES[i % len(CATEGORIES)],
+    }
+
+
+# The pre-catalog implementations from books.py, operating on a plain list.
+def list_get(books: list[dict], title: str):
+    for book in books:
+        if book.get("title").casefold() == title.casefold():
+            return book
+    return None
+
+
+def list_by_category(books: list[dict], category: str):
+    return [
+        book for book in books if book.get("category").casefold() == category.casefold()
+    ]
+
+
+def list_by_author_category(books: list[dict], author: str, category: str):
+    return [
+        book
+        for book in books
+        if book.get("author").casefold() == author.casefold()
+        and book.get("category").casefold() == category.casefold()
+    ]
+
+
+def list_with_title_prefix(books: list[dict], prefix: str, limit: int):
+    prefix = prefix.casefold()
+    matches = [book for book in books if book.get("title").casefold().startswith(prefix)]
+    # Same order as the catalog: casefolded title, then list position.
+    return sorted(matches, key=lambda book: book.get("title").casefold())[:limit]
+
+
+def list_replace(books: list[dict], updated: dict):
+    for i in range(len(books)):
+        if books[i].get("title").casefold() == updated.get("title").casefold():
+            books[i] = updated
+            return
+
+
+def list_remove(books: list[dict], title: str):
+    for i in range(len(books)):
+        if books[i].get("title").casefold() == title.casefold():
+            books.pop(i)
+            return
+
+
+def check_consistency(writes: int, size: int = 500):
+    """Random writes on both stores, then every lookup must agree."""
+    rng = random.Random(0)
+    books = [make_book(i) for i in range(size)]
+    catalog = TitleCatalog(list(books))
+    for _ in range(writes):
+        i = rng.randrange(size * 2)
+        book = make_book(i)
+        # Mixed case and moved categories exercise the casefolded re-indexing.
+        if i % 3:
+            book["title"] = book["title"].upper()
+        book["category"] = rng.choice(CATEGORIES)
+        operation = rng.random()
+        if operation < 0.4:
+            books.append(book)
+            catalog.add(book)
+        elif operation < 0.7:
+            list_replace(books, book)
+            catalog.replace(book)
+        else:
+            list_remove(books, book["title"])
+            catalog.remove(book["title"])
+
+    assert catalog.all() == books, "catalog order differs from the list"
+    for i in range(size * 2):
+        title = make_book(i)["title"]
+        assert catalog.get(title) is list_get(books, title), title
+    for category in CATEGORIES:
+        assert catalog.by_category(category) == list_by_category(books, category)
+        for author in range(0, 1000, 97):
+            expected = list_by_author_category(books, f"Author {author}", category)
+            assert catalog.by_author_category(f"Author {author}", category) == expected
+    for prefix in ["title 00000", "TITLE 000012", "title 0000999", "missing", ""]:
+        expected = list_with_title_prefix(books, prefix, 25)
+        assert catalog.with_title_prefix(prefix, 25) == expected, prefix
+
+
+def per_op(ops: int, func, args: list) -> float:
+    start = time.perf_counter()
+    for arg in args[:ops]:
+        func(arg)
+    return (time.perf_counter() - start) / ops
+
+
+def main(count: int, ops: int, writes: int):
+    check_consistency(writes)
+    print(f"indexes consistent with list scans after {writes} random writes")
+
+    books = [make_book(i) for i in range(count)]
+    start = time.perf_counter()
+    catalog = TitleCatalog(books)
+    build = time.perf_counter() - start
+
+    titles = [make_book(i)["title"].upper() for i in random.sample(range(count), ops)]
+    # Prefixes near the end of the sorted titles: the worst case for a scan
+    # that walks up to the first match.
+    prefixes = [make_book(count - 1 - i)["title"] for i in range(ops)]
+
+    rows = [
+        (
+            "get by title",
+            per_op(ops, lambda t: list_get(books, t), titles),
+            per_op(ops, catalog.get, titles),
+        ),
+        (
+            "author+category",
+            per_op(ops, lambda a: list_by_author_category(books, a, "math"), titles),
+            per_op(ops, lambda a: catalog.by_author_category(a, "math"), titles),
+        ),
+        (
+            "title prefix",
+            per_op(ops, lambda p: list_with_title_prefix(books, p, 10), prefixes),
+            per_op(ops, lambda p: catalog.with_title_prefix(p, 10), prefixes),
+        ),
+    ]
+
+    print(f"{count} books (catalog built in {build:.2f} s)")
+    print(f"{'operation':<18} {'list ms/op':>11} {'catalog ms/op':>14} {'speedup':>9}")
+    for name, scan, indexed in rows:
+        print(
+            f"{name:<18} {scan * 1000:>11.3f} {indexed * 1000:>14.4f} "
+            f"{scan / indexed:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.books, args.ops, args.writes)
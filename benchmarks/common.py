@@ -0,0 +1,105 @@
+"""Shared helpers for the TodoApp benchmarks.
+
+Each benchmark runs the real app in-process against a throwaway SQLite file,
+with authentication short-circuited so only the code under test is measured.
+"""
+
+import os
+import statistics
+import tempfile
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from TodoApp.database import Base, get_db
+from TodoApp.main import app
+from TodoApp.models import Todos, Users, create_schema
+from TodoApp.passwords import hash_password
+from TodoApp.routers.auth import get_current_user
+
+BENCH_USER = {"username": "bench", "id": 1, "user_role": "admin"}
+
+
+class BenchDatabase:
+    """A temporary database wired into ``app`` through dependency overrides."""
+
+    def __init__(self, path: str | None = None):
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="todoapp-bench-", suffix=".db")
+            os.close(fd)
+        self.path = path
+        self.engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine, autoflush=False, expire_on_commit=False
+        )
+        Base.metadata.drop_all(bind=self.engine)
+        create_schema(self.engine)
+
+    async def get_db(self):
+        async with self.AsyncSessionLocal() as db:
+            yield db
+
+    def install(self):
+        app.dependency_overrides[get_db] = self.get_db
+        app.dependency_overrides[get_current_user] = lambda: BENCH_USER
+
+    def seed_todos(self, count: int, owner_id: int = BENCH_USER["id"]):
+        rows = [
+            {
+                "title": f"Todo {i}",
+                "description": f"Benchmark todo number {i}",
+                "priority": i % 5 + 1,
+                "complete": i % 2 == 0,
+                "owner_id": owner_id,
+            }
+            for i in range(count)
+        ]
+        with self.engine.begin() as connection:
+            if rows:
+                connection.execute(insert(Todos), rows)
+
+    def seed_user(self, username: str, password: str, role: str = "admin") -> int:
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                insert(Users).returning(Users.id),
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "hashed_password": hash_password(password),
+                    "role": role,
+                    "is_active": True,
+                },
+            )
+            return result.scalar_one()
+
+    async def close(self):
+        app.dependency_overrides.clear()
+        await self.async_engine.dispose()
+        self.engine.dispose()
+        os.remove(self.path)
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """RPS and latency percentiles (in milliseconds) for one run."""
+    ordered = sorted(latencies)
+    if not ordered:
+        ordered = [0.0]
+        elapsed = 0.0
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
@@ -0,0 +1,246 @@
+"""Load test of the TodoApp over ASGI: RPS and latency percentiles per route and mix.
+
+Each mix is a weighted set of requests fired by `--concurrency` workers
+until `--requests` have completed. Results can be written to JSON and
+compared against a stored baseline; the run fails when a route's p95
+latency or throughput regresses by more than `--threshold`.
+
+Usage:
+    python -m benchmarks.load [--mixes read write] [--concurrency 16]
+        [--requests 2000] [--output run.json]
+        [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from .common import BenchDatabase, app, summarize
+from TodoApp.admission import LoginAdmission
+from TodoApp.routers import auth
+
+BENCH_PASSWORD = "bench-password"
+TODO = {"title": "Load test", "description": "Created by benchmarks.load", "priority": 3}
+
+
+class Session:
+    """Per-run state shared by the workers: ids of todos that exist."""
+
+    def __init__(self, todo_ids: list[int], seed: int):
+        self.todo_ids = todo_ids
+        self.random = random.Random(seed)
+
+    def pick(self) -> int | None:
+        return self.random.choice(self.todo_ids) if self.todo_ids else None
+
+    def take(self) -> int | None:
+        if not self.todo_ids:
+            return None
+        index = self.random.randrange(len(self.todo_ids))
+        self.todo_ids[index], self.todo_ids[-1] = self.todo_ids[-1], self.todo_ids[index]
+        return self.todo_ids.pop()
+
+
+# Each operation returns (route, response); the route names the template,
+# not the concrete URL, so results aggregate across ids.
+async def login(client, session):
+    return "POST /auth/token", await client.post(
+        "/auth/token", data={"username": "bench", "password": BENCH_PASSWORD}
+    )
+
+
+async def list_todos(client, session):
+    return "GET /todos/", await client.get("/todos/", params={"limit": 50})
+
+
+async def read_todo(client, session):
+    return "GET /todos/{id}", await client.get(f"/todos/{session.pick() or 1}")
+
+
+async def search_todos(client, session):
+    return "GET /todos/search", await client.get("/todos/search", params={"q": "todo"})
+
+
+async def create_todo(client, session):
+    response = await client.post("/todos/", json=TODO)
+    if response.status_code == 201:
+        session.todo_ids.append(response.json()["id"])
+    return "POST /todos/", response
+
+
+async def update_todo(client, session):
+    return "PUT /todos/{id}", await client.put(f"/todos/{session.pick() or 1}", json=TODO)
+
+
+async def delete_todo(client, session):
+    todo_id = session.take()
+    if todo_id is None:
+        return await create_todo(client, session)
+    return "DELETE /todos/{id}", await client.delete(f"/todos/{todo_id}")
+
+
+async def admin_list(client, session):
+    return "GET /admin/todo", await client.get("/admin/todo", params={"limit": 50})
+
+
+async def admin_stats(client, session):
+    return "GET /admin/stats", await client.get("/admin/stats")
+
+
+async def admin_delete(client, session):
+    todo_id = session.take()
+    if todo_id is None:
+        return await create_todo(client, session)
+    return "DELETE /admin/todo/{id}", await client.delete(f"/admin/todo/{todo_id}")
+
+
+MIXES = {
+    "login": [(login, 1)],
+    "read": [(list_todos, 6), (read_todo, 3), (search_todos, 1)],
+    "write": [(create_todo, 4), (update_todo, 4), (delete_todo, 2)],
+    "mixed": [
+        (list_todos, 5),
+        (read_todo, 2),
+        (create_todo, 1),
+        (update_todo, 1),
+        (delete_todo, 1),
+    ],
+    "admin": [(admin_list, 5), (admin_stats, 3), (admin_delete, 2)],
+}
+
+
+async def run_mix(client, name: str, concurrency: int, total: int, session: Session) -> dict:
+    operations, weights = zip(*MIXES[name])
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            operation = session.random.choices(operations, weights)[0]
+            start = time.perf_counter()
+            route, response = await operation(client, session)
+            latencies[route].append(time.perf_counter() - start)
+            # 404s are expected: workers race to update and delete the same ids.
+            if response.status_code >= 400 and response.status_code != 404:
+                errors[route] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    routes = {
+        route: {**summarize(samples, elapsed), "errors": errors[route]}
+        for route, samples in sorted(latencies.items())
+    }
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {"total": summarize(every, elapsed), "routes": routes}
+
+
+async def main(args) -> dict:
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "todos": args.todos,
+            "seed": args.seed,
+        },
+        "mixes": {},
+    }
+    # Every request comes from one client and one username: keep the global
+    # cap on logins in flight, but drop the per-IP and per-username buckets
+    # so the login mix measures password checks rather than 429s.
+    auth.login_admission = LoginAdmission(
+        per_ip=None, per_username=None, max_in_flight=auth.login_admission.max_in_flight
+    )
+    for name in args.mixes:
+        # A fresh database per mix, so one mix's writes don't skew the next.
+        database = BenchDatabase()
+        database.seed_user("bench", BENCH_PASSWORD)
+        database.seed_todos(args.todos)
+        database.install()
+        session = Session(list(range(1, args.todos + 1)), args.seed)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                warmup = min(50, args.requests)
+                await run_mix(client, name, min(args.concurrency, warmup), warmup, session)
+                results["mixes"][name] = await run_mix(
+                    client, name, args.concurrency, args.requests, session
+                )
+        finally:
+            await database.close()
+    return results
+
+
+def report(results: dict):
+    print(
+        f"{'mix':<7} {'route':<24} {'requests':>8} {'rps':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    for mix, result in results["mixes"].items():
+        rows = [*result["routes"].items(), ("(all)", {**result["total"], "errors": ""})]
+        for route, stats in rows:
+            print(
+                f"{mix:<7} {route:<24} {stats['requests']:>8} {stats['rps']:>9.1f} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                f"{stats['p99_ms']:>8.2f} {stats['errors']:>6}"
+            )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Routes whose p95 grew, or whose RPS fell, by more than threshold."""
+    regressions = []
+    for mix, result in results["mixes"].items():
+        base_routes = baseline.get("mixes", {}).get(mix, {}).get("routes", {})
+        for route, stats in result["routes"].items():
+            base = base_routes.get(route)
+            if base is None:
+                continue
+            if stats["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{mix} {route}: p95 {base['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms"
+                )
+            if stats["rps"] < base["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{mix} {route}: rps {base['rps']:.1f} -> {stats['rps']:.1f}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mixes", nargs="+", choices=MIXES, default=list(MIXES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--todos", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    report(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,64 @@
+"""Cost of serializing a large todo list: old ORM + jsonable_encoder path vs response model.
+
+Usage: python -m benchmarks.serialization [--rows 10000] [--repeat 20]
+"""
+
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from .common import app  # noqa: F401  (sets JWT_SECRET before auth is imported)
+from TodoApp.models import Todos
+from TodoApp.schemas import TodoResponse
+
+
+def old_path(rows: list[Todos]) -> bytes:
+    # What FastAPI did for handlers returning ORM objects with no response model.
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def new_path(adapter: TypeAdapter, rows: list[Todos]) -> bytes:
+    # What FastAPI does with a response model: validate from attributes, then
+    # serialize straight to JSON bytes in pydantic-core.
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(row_count: int, repeat: int):
+    rows = [
+        Todos(
+            id=i,
+            title=f"Todo {i}",
+            description=f"Benchmark todo number {i}",
+            priority=i % 5 + 1,
+            complete=i % 2 == 0,
+            owner_id=1,
+        )
+        for i in range(1, row_count + 1)
+    ]
+    adapter = TypeAdapter(list[TodoResponse])
+    old = best_of(repeat, old_path, rows)
+    new = best_of(repeat, new_path, adapter, rows)
+    print(f"{row_count} rows")
+    print(f"jsonable_encoder + json.dumps: {old * 1000:8.2f} ms")
+    print(f"response model (pydantic):     {new * 1000:8.2f} ms")
+    print(f"speedup:                       {old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,62 @@
+"""Write and read throughput of each SQLite engine profile in database.py.
+
+Usage: python -m benchmarks.sqlite_profiles [--writes 2000] [--reads 20000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import bindparam, create_engine, insert, select
+
+from .common import app  # noqa: F401  (sets JWT_SECRET before auth is imported)
+from TodoApp.database import ENGINE_PROFILES, apply_engine_profile
+from TodoApp.models import Todos, create_schema
+
+
+def run_profile(name: str, writes: int, reads: int) -> dict:
+    fd, path = tempfile.mkstemp(prefix=f"todoapp-{name}-", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    apply_engine_profile(engine, ENGINE_PROFILES[name])
+    create_schema(engine)
+    try:
+        # One transaction per row, like one POST /todos/ per request.
+        start = time.perf_counter()
+        for i in range(writes):
+            with engine.begin() as connection:
+                connection.execute(
+                    insert(Todos).values(title=f"Todo {i}", priority=1, owner_id=i % 10)
+                )
+        write_elapsed = time.perf_counter() - start
+
+        lookup = select(Todos).where(Todos.id == bindparam("todo_id"))
+        ids = [random.randint(1, writes) for _ in range(reads)]
+        start = time.perf_counter()
+        with engine.connect() as connection:
+            for todo_id in ids:
+                connection.execute(lookup, {"todo_id": todo_id}).one()
+        read_elapsed = time.perf_counter() - start
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return {"writes_per_s": writes / write_elapsed, "reads_per_s": reads / read_elapsed}
+
+
+def main(writes: int, reads: int):
+    print(f"{'profile':>8} {'writes/s':>10} {'reads/s':>10}")
+    for name in ENGINE_PROFILES:
+        stats = run_profile(name, writes, reads)
+        print(f"{name:>8} {stats['writes_per_s']:>10.0f} {stats['reads_per_s']:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.writes, args.reads)
@@ -0,0 +1,99 @@
+"""N-item throughput of the batch todo endpoints against one request per item.
+
+Usage: python -m benchmarks.todos_batch [--items 500]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .common import BenchDatabase, app
+
+TODO = {"title": "Batch todo", "description": "Benchmark", "priority": 3}
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def per_item(client: httpx.AsyncClient, items: int) -> dict:
+    async def create():
+        for _ in range(items):
+            (await client.post("/todos/", json=TODO)).raise_for_status()
+
+    async def update(ids):
+        for todo_id in ids:
+            (await client.put(f"/todos/{todo_id}", json=TODO)).raise_for_status()
+
+    async def remove(ids):
+        for todo_id in ids:
+            (await client.delete(f"/todos/{todo_id}")).raise_for_status()
+
+    created = await timed(create())
+    ids = [todo["id"] for todo in await all_todos(client)]
+    return {
+        "create": created,
+        "update": await timed(update(ids)),
+        "delete": await timed(remove(ids)),
+    }
+
+
+async def batched(client: httpx.AsyncClient, items: int) -> dict:
+    async def create():
+        (await client.post("/todos/batch", json=[TODO] * items)).raise_for_status()
+
+    async def update(ids):
+        body = [{"id": todo_id, **TODO} for todo_id in ids]
+        (await client.put("/todos/batch", json=body)).raise_for_status()
+
+    async def remove(ids):
+        response = await client.request("DELETE", "/todos/batch", json={"ids": ids})
+        response.raise_for_status()
+
+    created = await timed(create())
+    ids = [todo["id"] for todo in await all_todos(client)]
+    return {
+        "create": created,
+        "update": await timed(update(ids)),
+        "delete": await timed(remove(ids)),
+    }
+
+
+async def all_todos(client: httpx.AsyncClient) -> list[dict]:
+    todos, url = [], "/todos/?limit=100"
+    while url:
+        response = await client.get(url)
+        todos.extend(response.json())
+        url = response.links.get("next", {}).get("url")
+    return todos
+
+
+async def main(items: int):
+    database = BenchDatabase()
+    database.install()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            single = await per_item(client, items)
+            batch = await batched(client, items)
+    finally:
+        await database.close()
+
+    print(f"{items} items   {'per-item/s':>11} {'batch/s':>11} {'speedup':>8}")
+    for operation in ("create", "update", "delete"):
+        print(
+            f"{operation:<11} {items / single[operation]:>11.0f} "
+            f"{items / batch[operation]:>11.0f} "
+            f"{single[operation] / batch[operation]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.items))
@@ -0,0 +1,62 @@
+"""Throughput of ``GET /todos/`` as the number of simultaneous requests grows.
+
+Usage: python -m benchmarks.todos_concurrency [--requests 2000] [--todos 50]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from TodoApp.cache import todo_cache
+
+from .common import BenchDatabase, app, summarize
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> dict:
+    latencies: list[float] = []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.get("/todos/")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def main(levels: list[int], total: int, todos: int):
+    # Measure the database path, not repeat hits on the todo cache.
+    todo_cache.backend.maxsize = 0
+    database = BenchDatabase()
+    database.seed_todos(todos)
+    database.install()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run_level(client, 1, 50)  # warm up pools and caches
+            print(f"{'concurrency':>11} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8}")
+            for concurrency in levels:
+                stats = await run_level(client, concurrency, total)
+                print(
+                    f"{concurrency:>11} {stats['rps']:>9.1f} "
+                    f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+                )
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--todos", type=int, default=50)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+    asyncio.run(main(args.levels, args.requests, args.todos))
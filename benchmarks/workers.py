@@ -0,0 +1,145 @@
+"""Throughput of ``GET /todos/`` served by ``TodoApp.serve`` as the worker count grows.
+
+Usage: python -m benchmarks.workers [--workers 1 2 4] [--duration 10] [--clients 2]
+
+Each level starts a real multi-process server on a fresh database and drives
+it over HTTP from ``--clients`` load-generator processes. The clients run on
+the same machine and take CPU away from the workers, so scaling flattens
+before the core count; leave cores free (or lower --clients) for cleaner
+numbers. The todo cache is off at every level, as it is with several workers.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .common import BenchDatabase, summarize
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "bench-password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(directory: str, todos: int):
+    database = BenchDatabase(os.path.join(directory, "todosapp.db"))
+    owner_id = database.seed_user("bench", PASSWORD)
+    database.seed_todos(todos, owner_id=owner_id)
+    database.engine.dispose()
+
+
+def start_server(directory: str, port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": PACKAGE_ROOT,
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "benchmark-secret"),
+        "TODO_CACHE_SIZE": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "TodoApp.serve", "--workers", str(workers),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=directory,
+        env=env,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(f"{base_url}/healthy").raise_for_status()
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def login(base_url: str) -> str:
+    response = httpx.post(
+        f"{base_url}/auth/token", data={"username": "bench", "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def drive(base_url: str, token: str, concurrency: int, duration: float):
+    latencies: list[float] = []
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get("/todos/")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def run_client(args: tuple) -> list[float]:
+    return asyncio.run(drive(*args))
+
+
+def run_level(workers: int, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="todoapp-workers-") as directory:
+        seed(directory, args.todos)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(directory, port, workers)
+        try:
+            wait_until_ready(base_url)
+            token = login(base_url)
+            run_client((base_url, token, args.concurrency, 1.0))  # warm up every worker
+            client_args = (base_url, token, args.concurrency, args.duration)
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.map(run_client, [client_args] * args.clients)
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait(timeout=30)
+    return summarize([latency for result in results for latency in result], args.duration)
+
+
+def main(args):
+    print(f"{'workers':>7} {'rps':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    baseline = None
+    for workers in args.workers:
+        stats = run_level(workers, args)
+        baseline = baseline or stats["rps"]
+        print(
+            f"{workers:>7} {stats['rps']:>9.1f} {stats['rps'] / baseline:>7.2f}x "
+            f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, *(n for n in (2, 4, 8, 16) if n <= cores)}),
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=max(1, cores // 2))
+    parser.add_argument("--concurrency", type=int, default=16, help="per client")
+    parser.add_argument("--todos", type=int, default=50)
+    main(parser.parse_args())